@@ -13,14 +13,17 @@
     "website": "https://bit.ly/numigi-com",
     "depends": ["mail"],
     "external_dependencies": {
-        "python": ["aeroolib", "babel", "genshi"],
+        "python": ["aeroolib", "babel", "genshi", "PyPDF2"],
     },
     "data": [
         "security/security.xml",
+        "views/aeroo_render_job.xml",
+        "views/aeroo_render_stat.xml",
         "views/ir_actions_report.xml",
         "views/mail_template.xml",
         "views/report_aeroo_assets.xml",
         "data/report_aeroo_data.xml",
+        "data/ir_cron.xml",
         "security/ir.model.access.csv",
     ],
     "demo": ["demo/report_sample.xml"],
@@ -1,7 +1,9 @@
 # Copyright (c) 2009-2011 Alistek Ltd (http://www.alistek.com) All Rights Reserved.
 #                    General contacts <info@alistek.com>
 
-from odoo.tools import config, ustr
+from PIL import Image, ImageDraw
+
+from .render import BarcodeLayout, get_font, paste_bars
 
 fontsize = 12
 
@@ -149,43 +151,10 @@ class EanBarCode:
         value code barre value
         height height in pixel of the bar code
         extension image file extension"""
-        from PIL import Image, ImageFont, ImageDraw
-        import os
-
-        # Get the bar code list
-        bits = self.makeCode(value)
-
-        # Get thee bar code with the checksum added
-        code = ""
-        for digit in self.EAN13:
-            code += "%d" % digit
+        layout = self.getLayout(value, height)
 
         # Create a new image
-        position = 8
-        im = Image.new("L", (len(bits) + position, height + 2))
-
-        # Load font
-        ad = os.path.abspath(os.path.join(ustr(config["root_path"]), "addons"))
-        mod_path_list = list(
-            map(
-                lambda m: os.path.abspath(ustr(m.strip())),
-                config["addons_path"].split(","),
-            )
-        )
-        mod_path_list.append(ad)
-
-        for mod_path in mod_path_list:
-            font_file = (
-                mod_path
-                + os.path.sep
-                + "report_aeroo"
-                + os.path.sep
-                + "barcode"
-                + os.path.sep
-                + "FreeMonoBold.ttf"
-            )  # "courB08.pil"
-            if os.path.lexists(font_file):
-                font = ImageFont.truetype(font_file, fontsize)
+        im = Image.new("L", (layout.width, layout.height))
 
         # Create drawer
         draw = ImageDraw.Draw(im)
@@ -193,29 +162,40 @@ class EanBarCode:
         # Erase image
         draw.rectangle(((0, 0), (im.size[0], im.size[1])), fill=256)
 
-        # Draw first part of number
-        draw.text((0, height - 9), code[0], font=font, fill=0)
-
-        # Draw first part of number
-        draw.text((position + 3, height - 9), code[1:7], font=font, fill=0)
+        # Draw the parts of the number
+        for x, y, text, size in layout.texts:
+            draw.text((x, y), text, font=get_font(size), fill=0)
 
-        # Draw second part of number
-        draw.text(
-            (len(bits) / 2 + 2 + position, height - 9), code[7:], font=font, fill=0
-        )
-
-        # Draw the bar codes
-        for bit in range(len(bits)):
-            # Draw normal bar
-            if bits[bit] == "1":
-                draw.rectangle(
-                    ((bit + position, 0), (bit + position, height - 10)), fill=0
-                )
-            # Draw long bar
-            elif bits[bit] == "L":
-                draw.rectangle(
-                    ((bit + position, 0), (bit + position, height - 3)), fill=0
-                )
+        # Draw the bar codes, then extend the long bars
+        for row, top, bottom in layout.bars:
+            paste_bars(im, row, top, bottom)
 
         # Save the result image
         return im
+
+    def getLayout(self, value, height=50):
+        """Get the geometry of the bar code
+        value code barre value
+        height height in pixel of the bar code"""
+        # Get the bar code list
+        bits = self.makeCode(value)
+
+        # Get thee bar code with the checksum added
+        code = ""
+        for digit in self.EAN13:
+            code += "%d" % digit
+
+        position = 8
+        row = [False] * position + [bit in ("1", "L") for bit in bits]
+        long_row = [False] * position + [bit == "L" for bit in bits]
+
+        return BarcodeLayout(
+            len(bits) + position,
+            height + 2,
+            [(row, 0, height - 10), (long_row, height - 9, height - 3)],
+            [
+                (0, height - 9, code[0], fontsize),
+                (position + 3, height - 9, code[1:7], fontsize),
+                (len(bits) / 2 + 2 + position, height - 9, code[7:], fontsize),
+            ],
+        )
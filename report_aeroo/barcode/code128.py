@@ -3,7 +3,7 @@
 # This list was cut'n'pasted verbatim from the "Code 128 Specification Page"
 # at http://www.adams1.com/pub/russadam/128code.html
 
-from PIL import Image
+from .render import BarcodeLayout, make_bitmap
 
 
 codelist = """0 	SP 	SP 	00 	2 1 2 2 2 2
@@ -162,7 +162,23 @@ def get_code(message, xw=1, h=100, rotate=None):
     h is height in pixels.
 
     Returns a Python Imaging Library object."""
+    return make_bitmap(_get_bits(message, xw), h)
 
+
+def get_layout(message, xw=1, h=100):
+    """Get the geometry of a code128 barcode.
+
+    :param str message: the message to encode
+    :param int xw: the width in pixels of the narrowest bar
+    :param int h: the height in pixels
+    :rtype: BarcodeLayout
+    """
+    bars = [not white for white in _get_bits(message, xw)]
+    return BarcodeLayout(len(bars), h, [(bars, 0, h - 1)], [])
+
+
+def _get_bits(message, xw):
+    """Get the pixels of a row of the barcode, True for white pixels."""
     widths = [xw * 20] + encode_message(message) + [xw * 20]
 
     bits = []
@@ -171,13 +187,4 @@ def get_code(message, xw=1, h=100, rotate=None):
         bits = bits + [i] * w * xw
         i = 1 - i
 
-    # print len(bits)
-    # print bits
-
-    i = Image.new("1", (len(bits), h), 1)
-
-    for b in range(len(bits)):
-        for y in range(h):
-            i.putpixel((b, y), 255 * bits[b])
-
-    return i
+    return [bit == 1 for bit in bits]
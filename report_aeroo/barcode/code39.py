@@ -15,9 +15,9 @@
 # a min line width of 2px with "Hello World" encoded as "*HELLO WORLD*" in
 # Code 39
 
-from PIL import Image, ImageDraw, ImageFont
-from odoo.tools import config, ustr
-import os
+from PIL import Image, ImageDraw
+
+from .render import BarcodeLayout, get_font, paste_bars
 
 marginx = 10
 marginy = 10
@@ -71,7 +71,34 @@ charmap = {
 }
 
 
-def create_c39(height, smallest, text):  # noqa C901
+def create_c39(height, smallest, text):
+    layout = layout_c39(height, smallest, text)
+    barcode_img = Image.new("RGB", [layout.width, layout.height], "white")
+
+    if not layout.bars:
+        return barcode_img
+
+    for row, top, bottom in layout.bars:
+        paste_bars(barcode_img, row, top, bottom)
+
+    draw = ImageDraw.Draw(barcode_img)
+
+    for x, y, newtext, size in layout.texts:
+        draw.text((x, y), newtext, font=get_font(size), fill=0)
+
+    del draw
+
+    return barcode_img
+
+
+def layout_c39(height, smallest, text):  # noqa C901
+    """Get the geometry of a code39 barcode.
+
+    :param int height: the height of the bars in pixels
+    :param int smallest: the width in pixels of the narrowest bar
+    :param str text: the text to encode
+    :rtype: BarcodeLayout
+    """
     pixel_length = 0
     i = 0
     newtext = ""
@@ -105,82 +132,31 @@ def create_c39(height, smallest, text):  # noqa C901
     pixel_length = pixel_length + 2 * marginx + len(newtext) * smallest
     pixel_height = height + 2 * marginy + fontsize
 
-    barcode_img = Image.new("RGB", [pixel_length, pixel_height], "white")
-
     if len(seglist) == 0:
-        return barcode_img
+        return BarcodeLayout(pixel_length, pixel_height, [], [])
 
-    i = 0
-    draw = ImageDraw.Draw(barcode_img)
+    bars = [False] * pixel_length
     current_x = marginx
 
-    while i < len(seglist):
-        seg = seglist[i]
-        color = (255, 255, 255)
-        wdth = smallest
-
-        if seg == 0 or seg == 2:
-            color = 0
-            if seg == 0:
-                wdth = smallest
-            else:
-                wdth = smallest * 3
-        elif seg == 1 or seg == 3:
-            color = (255, 255, 255)
-            if seg == 1:
-                wdth = smallest
-            else:
-                wdth = smallest * 3
-
-        j = 1
-
-        while j <= wdth:
-            draw.line((current_x, marginy, current_x, marginy + height), fill=color)
-            current_x = current_x + 1
-            j = j + 1
+    for i, seg in enumerate(seglist):
+        wdth = smallest * 3 if seg in (2, 3) else smallest
+
+        if seg in (0, 2):
+            bars[current_x : current_x + wdth] = [True] * wdth
+
+        current_x += wdth
 
         if ((i + 1) % 9) == 0:
-            j = 1
-            while j <= smallest:
-                draw.line(
-                    (current_x, marginy, current_x, marginy + height),
-                    fill=(255, 255, 255),
-                )
-                current_x = current_x + 1
-                j = j + 1
-        i = i + 1
+            current_x += smallest
 
-    ad = os.path.abspath(os.path.join(ustr(config["root_path"]), "addons"))
-    mod_path_list = list(
-        map(
-            lambda m: os.path.abspath(ustr(m.strip())), config["addons_path"].split(",")
-        )
-    )
-    mod_path_list.append(ad)
-
-    for mod_path in mod_path_list:
-        font_file = (
-            mod_path
-            + os.path.sep
-            + "report_aeroo"
-            + os.path.sep
-            + "barcode"
-            + os.path.sep
-            + "FreeMonoBold.ttf"
-        )
-        if os.path.lexists(font_file):
-            font = ImageFont.truetype(font_file, fontsize)
-
-    draw.text(
-        (
-            pixel_length / 2 - len(newtext) * (fontsize / 2) / 2 - len(newtext),
-            height + fontsize,
-        ),
-        newtext,
-        font=font,
-        fill=0,
+    text_position = (
+        pixel_length / 2 - len(newtext) * (fontsize / 2) / 2 - len(newtext),
+        height + fontsize,
     )
 
-    del draw
-
-    return barcode_img
+    return BarcodeLayout(
+        pixel_length,
+        pixel_height,
+        [(bars, marginy, marginy + height)],
+        [(*text_position, newtext, fontsize)],
+    )
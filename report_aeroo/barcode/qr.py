@@ -1,12 +1,46 @@
 # Copyright 2022 - today Numigi (tm) and all its contributors (https://bit.ly/numigiens)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+from PIL import Image
+
+from .render import BarcodeLayout
+
+BOX_SIZE = 10
+
 
 def make_qr_code(code):
+    # The matrix (border included) is drawn with one pixel per module,
+    # then each module is scaled to a square of BOX_SIZE pixels.
+    matrix = _get_matrix(code)
+    size = len(matrix)
+    modules = bytes(0 if module else 255 for row in matrix for module in row)
+    image = Image.frombytes("1", (size, size), modules, "raw", "1;8")
+    return image.resize((size * BOX_SIZE, size * BOX_SIZE), Image.NEAREST)
+
+
+def get_qr_layout(code):
+    """Get the geometry of a QR code, with squares of BOX_SIZE pixels per module.
+
+    :param str code: the data to encode
+    :rtype: BarcodeLayout
+    """
+    matrix = _get_matrix(code)
+    size = len(matrix) * BOX_SIZE
+    bars = [
+        (
+            [module for module in row for __ in range(BOX_SIZE)],
+            i * BOX_SIZE,
+            (i + 1) * BOX_SIZE - 1,
+        )
+        for i, row in enumerate(matrix)
+    ]
+    return BarcodeLayout(size, size, bars, [])
+
+
+def _get_matrix(code):
     import qrcode
 
-    qr = qrcode.QRCode(box_size=10)
+    qr = qrcode.QRCode(box_size=BOX_SIZE)
     qr.add_data(code)
     qr.make(fit=True)
-
-    return qr.make_image(fill_color="black", back_color="white")
+    return qr.get_matrix()
@@ -0,0 +1,74 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+"""Helpers for drawing barcodes without drawing each pixel separately.
+
+A barcode is a single row of bars repeated over its height.
+The row is built once as a byte buffer, then repeated to create the image.
+"""
+
+import os
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+from PIL import Image, ImageFont
+
+FONT_PATH = os.path.join(os.path.dirname(__file__), "FreeMonoBold.ttf")
+
+
+class BarcodeLayout(NamedTuple):
+    """The geometry of a barcode, independent of the output format.
+
+    The same layout is drawn as a png image or as a vector image.
+    """
+
+    width: int
+    height: int
+
+    # Tuples (row, top, bottom), where row is a list of booleans,
+    # True for the bar pixels painted from the line top to the line bottom.
+    bars: List[Tuple[list, int, int]]
+
+    # Tuples (x, y, text, font size), where (x, y) is the top left corner of the text.
+    texts: List[Tuple[float, float, str, int]]
+
+
+@lru_cache(maxsize=None)
+def get_font(size):
+    """Get the font used for printing the text under barcodes.
+
+    The font is loaded once per process and size.
+
+    :param int size: the size of the font
+    :rtype: PIL.ImageFont.FreeTypeFont
+    """
+    return ImageFont.truetype(FONT_PATH, size)
+
+
+def make_bitmap(row, height):
+    """Make a black and white image from a row of pixels repeated over the given height.
+
+    :param list row: a list of booleans, True for white pixels
+    :param int height: the height of the image in pixels
+    :rtype: PIL.Image.Image
+    """
+    row_bytes = bytes(255 if pixel else 0 for pixel in row)
+    return Image.frombytes("1", (len(row), height), row_bytes * height, "raw", "1;8")
+
+
+def paste_bars(image, row, top, bottom, color=0):
+    """Paint the bars of a row in the given image between two lines.
+
+    :param image: the image where to paint the bars
+    :param list row: a list of booleans, True for the bar pixels of the row
+    :param int top: the first line of the bars
+    :param int bottom: the last line of the bars (inclusive)
+    :param color: the color of the bars
+    """
+    if bottom < top:
+        return
+
+    image.paste(
+        color,
+        (0, top, len(row), bottom + 1),
+        make_bitmap(row, bottom - top + 1),
+    )
@@ -0,0 +1,75 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+"""Draw the layout of a barcode as an SVG image.
+
+The bars of each row are merged into rectangles of consecutive bar pixels,
+so that the image stays sharp at any print resolution.
+"""
+
+from xml.sax.saxutils import escape, quoteattr
+
+from .render import get_font
+
+FONT_FAMILY = "FreeMono, Courier New, monospace"
+
+
+def render_svg(layout):
+    """Draw the layout of a barcode as an SVG image.
+
+    The unit of the image is the pixel of the equivalent png image.
+
+    :param BarcodeLayout layout: the geometry of the barcode
+    :rtype: bytes
+    """
+    elements = [
+        '<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+        'width="{w}" height="{h}" viewBox="0 0 {w} {h}">'.format(
+            w=layout.width, h=layout.height
+        ),
+        '<rect width="{}" height="{}" fill="white"/>'.format(
+            layout.width, layout.height
+        ),
+    ]
+
+    path = "".join(
+        "M{} {}h{}v{}h-{}z".format(x, top, width, bottom - top + 1, width)
+        for row, top, bottom in layout.bars
+        if bottom >= top
+        for x, width in _iter_runs(row)
+    )
+    if path:
+        elements.append(
+            '<path d="{}" fill="black" shape-rendering="crispEdges"/>'.format(path)
+        )
+
+    for x, y, text, size in layout.texts:
+        ascent = get_font(size).getmetrics()[0]
+        elements.append(
+            '<text x="{}" y="{}" font-family={} font-size="{}" font-weight="bold" '
+            'xml:space="preserve">{}</text>'.format(
+                x, y + ascent, quoteattr(FONT_FAMILY), size, escape(text)
+            )
+        )
+
+    elements.append("</svg>")
+    return "".join(elements).encode()
+
+
+def _iter_runs(row):
+    """Iterate over the sequences of consecutive bar pixels of a row.
+
+    :param list row: a list of booleans, True for the bar pixels
+    :return: an iterator of tuples (x, width)
+    """
+    start = None
+
+    for x, bar in enumerate(row):
+        if bar and start is None:
+            start = x
+        elif not bar and start is not None:
+            yield start, x - start
+            start = None
+
+    if start is not None:
+        yield start, len(row) - start
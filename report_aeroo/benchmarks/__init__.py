@@ -0,0 +1,2 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
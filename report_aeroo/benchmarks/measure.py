@@ -0,0 +1,99 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+import json
+import platform
+import resource
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class StageTimer(object):
+    """Collect the durations of the stages of a benchmark.
+
+    Each stage may be measured many times (i.e. once per record).
+    """
+
+    def __init__(self):
+        self.durations = defaultdict(list)
+
+    @contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[stage].append(time.perf_counter() - start)
+
+    def summarize(self):
+        """Summarize the measured durations of each stage.
+
+        :rtype: dict
+        """
+        return {
+            stage: summarize_durations(durations)
+            for stage, durations in self.durations.items()
+        }
+
+
+def percentile(values, rank):
+    """Compute a percentile of the given values using linear interpolation.
+
+    :param list values: the measured values
+    :param float rank: the percentile to compute, between 0 and 100
+    """
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+    position = (len(values) - 1) * rank / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize_durations(durations):
+    """Summarize a list of durations in seconds.
+
+    :rtype: dict
+    """
+    return {
+        "count": len(durations),
+        "total": sum(durations),
+        "p50": percentile(durations, 50),
+        "p95": percentile(durations, 95),
+        "max": max(durations) if durations else 0.0,
+    }
+
+
+def get_peak_memory():
+    """Get the peak resident memory in kilobytes.
+
+    The memory of the Odoo process and of its children
+    (i.e. Libreoffice started from the command line) is reported separately.
+
+    :rtype: dict
+    """
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+def write_results(results, path, version=None):
+    """Write the benchmark results into a json file.
+
+    :param list results: the results of each benchmark scenario
+    :param str path: the path of the output file
+    :param str version: the installed version of the module
+    """
+    document = {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "version": version,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(path, "w") as output:
+        json.dump(document, output, indent=2, sort_keys=True)
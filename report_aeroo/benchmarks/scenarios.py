@@ -0,0 +1,128 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+import time
+
+from .measure import StageTimer, get_peak_memory, summarize_durations
+
+
+def benchmark_report_per_record(report, records, output_format):
+    """Benchmark a report rendered individually for each record.
+
+    The stages are measured separately:
+
+    * template_load: getting the binary content of the template
+    * render: rendering the template with Genshi
+    * conversion: converting a chunk of documents with Libreoffice
+    * merge: merging the pdf documents together
+
+    :param report: the aeroo report to benchmark
+    :param records: the records for which to render the report
+    :param str output_format: the output format of the report
+    :return: the result of the benchmark
+    :rtype: dict
+    """
+    timer = StageTimer()
+    start = time.perf_counter()
+
+    outputs = []
+    for record in records:
+        render_context = report._get_aeroo_render_context(record)
+        with timer.measure("template_load"):
+            template = report._get_aeroo_template(record, render_context)
+
+        report_context = report._get_aeroo_context(record, render_context)
+        data = dict(
+            o=record.with_context(**report_context),
+            company=render_context.company,
+            **report_context
+        )
+        with timer.measure("render"):
+            outputs.append(
+                report.with_context(**report_context)._render_aeroo_content(
+                    template, data, report.aeroo_in_format
+                )
+            )
+
+    conversion_per_record = [0.0] * len(outputs)
+    if report.aeroo_in_format != output_format:
+        batch_size = report._get_aeroo_conversion_batch_size()
+        converted = []
+        for chunk_start in range(0, len(outputs), batch_size):
+            chunk_end = chunk_start + batch_size
+            with timer.measure("conversion"):
+                converted.extend(
+                    report._convert_aeroo_reports(
+                        outputs[chunk_start:chunk_end],
+                        output_format,
+                        records[chunk_start:chunk_end],
+                    )
+                )
+            chunk_duration = timer.durations["conversion"][-1]
+            chunk_length = len(outputs[chunk_start:chunk_end])
+            for index in range(chunk_start, chunk_start + chunk_length):
+                conversion_per_record[index] = chunk_duration / chunk_length
+        outputs = converted
+
+    if output_format == "pdf" and len(outputs) > 1:
+        with timer.measure("merge"):
+            report._merge_aeroo_pdf(outputs)
+
+    record_latencies = [
+        load + render + conversion
+        for load, render, conversion in zip(
+            timer.durations["template_load"],
+            timer.durations["render"],
+            conversion_per_record,
+        )
+    ]
+    return _get_result(report, records, output_format, timer, start, record_latencies)
+
+
+def benchmark_report_from_list(report, records, output_format):
+    """Benchmark a report rendered once for a list of records.
+
+    :param report: the aeroo report to benchmark
+    :param records: the records for which to render the report
+    :param str output_format: the output format of the report
+    :return: the result of the benchmark
+    :rtype: dict
+    """
+    timer = StageTimer()
+    start = time.perf_counter()
+
+    render_context = report._get_aeroo_render_context(records[0])
+    with timer.measure("template_load"):
+        template = report._get_aeroo_template(records[0], render_context)
+
+    report_context = report._get_aeroo_context(records[0], render_context)
+    data = dict(
+        objects=records,
+        company=render_context.company,
+        **report_context
+    )
+    with timer.measure("render"):
+        output = report.with_context(**report_context)._render_aeroo_content(
+            template, data, report.aeroo_in_format
+        )
+
+    if report.aeroo_in_format != output_format:
+        with timer.measure("conversion"):
+            report._convert_aeroo_report(output, output_format)
+
+    return _get_result(report, records, output_format, timer, start)
+
+
+def _get_result(report, records, output_format, timer, start, record_latencies=None):
+    elapsed = time.perf_counter() - start
+    return {
+        "report": report.report_name,
+        "template": report.aeroo_template_path,
+        "output_format": output_format,
+        "records": len(records),
+        "elapsed": elapsed,
+        "records_per_second": len(records) / elapsed if elapsed else 0.0,
+        "stages": timer.summarize(),
+        "record_latency": summarize_durations(record_latencies or []),
+        "peak_memory_kb": get_peak_memory(),
+    }
@@ -0,0 +1,65 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import os
+import unittest
+from odoo.tests import common
+
+from .measure import write_results
+from .scenarios import benchmark_report_from_list, benchmark_report_per_record
+
+RECORD_COUNTS = [
+    int(count)
+    for count in os.environ.get(
+        "AEROO_BENCHMARK_RECORD_COUNTS", "1,10,100,1000,10000"
+    ).split(",")
+]
+
+
+@unittest.skipUnless(
+    os.environ.get("AEROO_BENCHMARK"), "Set AEROO_BENCHMARK=1 to run the benchmarks."
+)
+class TestBenchmarkRendering(common.SavepointCase):
+    """Measure the throughput of the demo reports.
+
+    The results are written into the json file given by the environment
+    variable AEROO_BENCHMARK_OUTPUT, so that runs can be compared.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partners = cls.env["res.partner"].create(
+            [
+                {"name": "Partner {}".format(i), "lang": "en_US"}
+                for i in range(max(RECORD_COUNTS))
+            ]
+        )
+        cls.results = []
+
+    @classmethod
+    def tearDownClass(cls):
+        write_results(
+            cls.results,
+            os.environ.get("AEROO_BENCHMARK_OUTPUT", "aeroo_benchmark.json"),
+            cls.env.ref("base.module_report_aeroo").installed_version,
+        )
+        super().tearDownClass()
+
+    def _run(self, benchmark, report, output_format):
+        for count in RECORD_COUNTS:
+            self.results.append(
+                benchmark(report, self.partners[:count], output_format)
+            )
+
+    def test_template_odt(self):
+        report = self.env.ref("report_aeroo.aeroo_sample_report")
+        self._run(benchmark_report_per_record, report, "pdf")
+
+    def test_template_multi_odt(self):
+        report = self.env.ref("report_aeroo.aeroo_sample_report_multi")
+        self._run(benchmark_report_from_list, report, "pdf")
+
+    def test_template_ods(self):
+        report = self.env.ref("report_aeroo.aeroo_sample_report_ods")
+        self._run(benchmark_report_from_list, report, "ods")
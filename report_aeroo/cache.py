@@ -0,0 +1,114 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """A thread-safe least recently used cache.
+
+    The size of the cache is the sum of the sizes of its values.
+    By default, each value has a size of 1, so that the maximum size
+    is a number of entries.
+
+    The cache counts hits and misses, so that its efficiency can be monitored.
+    """
+
+    def __init__(self, max_size, sizeof=None):
+        """Initialize the cache.
+
+        :param max_size: the maximum size of the cache
+        :param sizeof: an optional function returning the size of a value
+        """
+        self.max_size = max_size
+        self._sizeof = sizeof or (lambda value: 1)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Get the value stored for the given key.
+
+        The entry becomes the most recently used entry of the cache.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def set(self, key, value):
+        """Store a value in the cache, evicting the least recently used entries."""
+        size = self._sizeof(value)
+
+        with self._lock:
+            self.pop(key)
+
+            if size > self.max_size:
+                return
+
+            self._entries[key] = (value, size)
+            self._size += size
+
+            while self._size > self.max_size:
+                __, (__, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def get_or_set(self, key, factory):
+        """Get the value stored for the given key or compute it.
+
+        :param key: the key of the value
+        :param factory: a function without parameter returning the value to store
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def pop(self, key):
+        """Remove an entry from the cache.
+
+        :return: the removed value or None
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self._size -= entry[1]
+            return entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """Get the statistics of the cache.
+
+        :rtype: dict
+        """
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "entries": len(self._entries),
+            "size": self._size,
+            "max_size": self.max_size,
+        }
+
+
+_MISSING = object()
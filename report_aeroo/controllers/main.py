@@ -3,11 +3,21 @@
 # License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
 
 import json
+import logging
+import os
+from werkzeug.http import quote_etag
+from werkzeug.urls import url_quote
+from werkzeug.wsgi import wrap_file
 from odoo import http, _
 from odoo.http import request, content_disposition
+from odoo.tools import config
 from odoo.addons.web.controllers.main import serialize_exception
 from odoo.exceptions import ValidationError
 
+from ..timing import collect_render_timings
+
+logger = logging.getLogger(__name__)
+
 MIMETYPES_MAPPING = {
     "doc": "application/vnd.ms-word",
     "ods": "application/vnd.oasis.opendocument.spreadsheet",
@@ -18,6 +28,109 @@ MIMETYPES_MAPPING = {
 
 DEFAULT_MIMETYPE = "octet-stream"
 
+SENDFILE_MODES = ("x-sendfile", "x-accel-redirect")
+
+
+def make_aeroo_file_response(output, headers, cookies=None):
+    """Make a response streaming the content of a binary file.
+
+    The file is sent by blocks and closed at the end of the response.
+    Range requests are supported, so that a large document can be
+    resumed or read partially by the browser.
+
+    When the file is stored in the filestore and the server option aeroo_sendfile
+    is set, the file is sent by the reverse proxy instead of the Odoo worker.
+
+    :param output: the binary file object, positioned at its beginning
+    :param list headers: the headers of the response
+    :param dict cookies: the cookies of the response
+    :return: the response
+    """
+    sendfile_headers = _get_sendfile_headers(output, request.db)
+    if sendfile_headers:
+        output.close()
+        return request.make_response(
+            b"", headers=headers + sendfile_headers, cookies=cookies
+        )
+
+    size = output.seek(0, os.SEEK_END)
+    output.seek(0)
+
+    response = request.make_response(
+        wrap_file(request.httprequest.environ, output),
+        headers=headers + [("Content-Length", size)],
+        cookies=cookies,
+    )
+    response.direct_passthrough = True
+    return response.make_conditional(
+        request.httprequest, accept_ranges=True, complete_length=size
+    )
+
+
+def get_aeroo_cache_headers(report, doc_ids, output_format):
+    """Get the headers controlling the cache of a downloaded report in the browser.
+
+    :param report: the aeroo report
+    :param list doc_ids: the ids of the records
+    :param str output_format: the output format of the report
+    :return: a tuple (etag, headers), where etag is None if the document
+        can not be identified before rendering it
+    """
+    etag = report._get_aeroo_etag(doc_ids, output_format)
+    headers = [("ETag", quote_etag(etag))] if etag else []
+
+    if report.aeroo_cache_control:
+        headers.append(("Cache-Control", report.aeroo_cache_control))
+
+    return etag, headers
+
+
+def get_aeroo_not_modified_response(etag, headers, cookies=None):
+    """Get a response telling the browser that its copy of the document is up to date.
+
+    :param etag: the entity tag of the document or None
+    :param list headers: the cache headers of the response
+    :param dict cookies: the cookies of the response
+    :return: a response with the status 304 or None if the document must be sent
+    """
+    if not etag or not request.httprequest.if_none_match.contains(etag):
+        return None
+
+    response = request.make_response(b"", headers=headers, cookies=cookies)
+    response.status_code = 304
+    return response
+
+
+def _get_sendfile_headers(output, dbname):
+    """Get the headers delegating the download of a file to the reverse proxy.
+
+    With X-Sendfile, the header contains the absolute path of the file.
+    With X-Accel-Redirect, the header contains the path of the file relative
+    to the filestore, under the internal location given by the server option
+    aeroo_sendfile_location.
+
+    :param output: the binary file object to send
+    :param str dbname: the name of the database
+    :return: a list of headers or an empty list if the file must be sent by Odoo
+    """
+    mode = (config.get("aeroo_sendfile") or "").lower()
+    path = getattr(output, "name", None)
+    if mode not in SENDFILE_MODES or not isinstance(path, str):
+        return []
+
+    filestore = os.path.realpath(os.path.dirname(config.filestore(dbname)))
+    path = os.path.realpath(path)
+    if not path.startswith(filestore + os.sep):
+        return []
+
+    if mode == "x-sendfile":
+        return [("X-Sendfile", path)]
+
+    location = config.get("aeroo_sendfile_location") or "/aeroo_filestore"
+    relative_path = os.path.relpath(path, filestore).replace(os.sep, "/")
+    redirect = "{}/{}".format(location.rstrip("/"), url_quote(relative_path))
+    return [("X-Accel-Redirect", redirect)]
+
 
 class AerooReportController(http.Controller):
 
@@ -34,27 +147,82 @@ class AerooReportController(http.Controller):
         record_ids = json.loads(record_ids)
 
         report = request.env["ir.actions.report"].browse(report_id)
-        content, out_format = report._render_aeroo(record_ids, {})
 
-        if len(record_ids) == 1:
-            record = request.env[report.model].browse(record_ids[0])
-            file_name = report.get_aeroo_filename(record, out_format)
-        else:
-            file_name = "%s.%s" % (report.name, out_format)
+        job = self._start_aeroo_render_job(report, record_ids)
+        if job:
+            return request.make_response(
+                json.dumps({"job_id": job.id}),
+                headers=[("Content-Type", "application/json")],
+                cookies={"fileToken": token},
+            )
+
+        cookies = {"fileToken": token}
+        etag, cache_headers = get_aeroo_cache_headers(
+            report, record_ids, report.aeroo_out_format_id.code
+        )
+        not_modified = get_aeroo_not_modified_response(etag, cache_headers, cookies)
+        if not_modified:
+            return not_modified
+
+        query_count = request.env.cr.sql_log_count
+
+        with collect_render_timings() as timings:
+            output, out_format = report._render_aeroo_file(record_ids, {})
+
+            try:
+                if len(record_ids) == 1:
+                    record = request.env[report.model].browse(record_ids[0])
+                    file_name = report.get_aeroo_filename(record, out_format)
+                else:
+                    file_name = "%s.%s" % (report.name, out_format)
+            except Exception:
+                output.close()
+                raise
+
+        timings.query_count = request.env.cr.sql_log_count - query_count
+        logger.debug(
+            "Aeroo report %s rendered for %s record(s): %s",
+            report.name,
+            len(record_ids),
+            timings,
+        )
 
         report_mimetype = MIMETYPES_MAPPING.get(out_format, DEFAULT_MIMETYPE)
 
-        response = request.make_response(
-            content,
+        return make_aeroo_file_response(
+            output,
             headers=[
                 ("Content-Disposition", content_disposition(file_name)),
                 ("Content-Type", report_mimetype),
-                ("Content-Length", len(content)),
-            ],
-            cookies={"fileToken": token},
+                ("Server-Timing", timings.get_server_timing()),
+            ]
+            + cache_headers,
+            cookies=cookies,
         )
 
-        return response
+    @http.route("/web/report_aeroo/job", type="json", auth="user")
+    def start_aeroo_report_job(self, report_id, record_ids):
+        """Start rendering an aeroo report in background if required.
+
+        Above the background threshold of the report, the report is rendered
+        by a scheduled action instead of the HTTP worker.
+
+        :return: a dict containing the id of the job or False if the report
+            must be downloaded directly.
+        """
+        report = request.env["ir.actions.report"].browse(int(report_id))
+        job = self._start_aeroo_render_job(report, record_ids)
+        return {"job_id": job.id if job else False}
+
+    @staticmethod
+    def _start_aeroo_render_job(report, record_ids):
+        """Create a background render job if the report requires it.
+
+        :return: the job or None
+        """
+        if report._should_render_aeroo_in_background(record_ids):
+            return report._render_aeroo_in_background(record_ids)
+        return None
 
     @staticmethod
     def _get_aeroo_report_from_name(report_name):
@@ -2,7 +2,13 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/gpl).
 
 from odoo.addons.portal.controllers.portal import CustomerPortal
-from odoo.http import content_disposition, request
+from odoo.http import content_disposition
+
+from .main import (
+    get_aeroo_cache_headers,
+    get_aeroo_not_modified_response,
+    make_aeroo_file_response,
+)
 
 
 class Portal(CustomerPortal):
@@ -17,17 +23,25 @@ class Portal(CustomerPortal):
         :param template: the aeroo report template.
         :param download: whether the report is dowloaded or only shown to the screen.
         """
-        pdf = template.sudo()._render_aeroo(
+        etag, cache_headers = get_aeroo_cache_headers(
+            template.sudo(), [record.id], "pdf"
+        )
+        not_modified = get_aeroo_not_modified_response(etag, cache_headers)
+        if not_modified:
+            return not_modified
+
+        output, __ = template.sudo()._render_aeroo_file(
             doc_ids=[record.id], force_output_format="pdf"
-        )[0]
+        )
 
-        headers = [
-            ("Content-Type", "application/pdf"),
-            ("Content-Length", len(pdf)),
-        ]
+        headers = [("Content-Type", "application/pdf")] + cache_headers
 
         if download:
-            filename = template.sudo().get_aeroo_filename(record, "pdf")
+            try:
+                filename = template.sudo().get_aeroo_filename(record, "pdf")
+            except Exception:
+                output.close()
+                raise
             headers.append(("Content-Disposition", content_disposition(filename)))
 
-        return request.make_response(pdf, headers=headers)
+        return make_aeroo_file_response(output, headers)
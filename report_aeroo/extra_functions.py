@@ -6,21 +6,33 @@
 import babel.numbers
 import babel.dates
 import base64
+import hashlib
 import itertools
 import logging
-from babel.core import localedata
+import pytz
+import re
 from datetime import datetime, date, timedelta
 from html2text import html2text
 from io import BytesIO
 from PIL import Image
 
-from odoo import fields, _
+from odoo import fields, models, _
 from odoo.exceptions import ValidationError
+from odoo.tools import config
 
-from .barcode.code128 import get_code
-from .barcode.code39 import create_c39
+from .barcode.code128 import get_code, get_layout as get_code_layout
+from .barcode.code39 import create_c39, layout_c39
 from .barcode.EANBarCode import EanBarCode
-from .barcode.qr import make_qr_code
+from .barcode.qr import get_qr_layout, make_qr_code
+from .barcode.svg import render_svg
+from .cache import LRUCache
+from .formatting import (
+    get_datetime_pattern,
+    get_locale,
+    get_locale_from_lang_and_country_code,
+    get_number_pattern,
+    get_timezone,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -92,7 +104,9 @@ def format_date(report, value: date, date_format: str):
     if not value:
         return ""
     lang = report._context.get("lang") or "en_US"
-    return babel.dates.format_date(value, date_format, locale=lang)
+    return babel.dates.format_date(
+        value, get_datetime_pattern(date_format), locale=get_locale(lang)
+    )
 
 
 @aeroo_util("today")
@@ -118,12 +132,32 @@ def format_datetime(report, value: datetime, datetime_format: str):
     if not value:
         return ""
     lang = report._context.get("lang") or "en_US"
-    datetime_in_timezone = fields.Datetime.context_timestamp(report, value)
+    datetime_in_timezone = _get_timestamp_in_timezone(report, value)
     return babel.dates.format_datetime(
-        datetime_in_timezone, datetime_format, locale=lang
+        datetime_in_timezone,
+        get_datetime_pattern(datetime_format),
+        locale=get_locale(lang),
     )
 
 
+def _get_timestamp_in_timezone(report, value):
+    """Convert a naive UTC datetime into the timezone of the context.
+
+    This is the same as fields.Datetime.context_timestamp,
+    except that the timezone objects are cached.
+    """
+    utc_timestamp = pytz.utc.localize(value, is_dst=False)
+    tz_name = report._context.get("tz") or report.env.user.tz
+
+    if tz_name:
+        try:
+            return utc_timestamp.astimezone(get_timezone(tz_name))
+        except Exception:
+            logger.debug("Failed to convert the timestamp to the timezone %s.", tz_name)
+
+    return utc_timestamp
+
+
 @aeroo_util("now")
 def format_datetime_now(report, datetime_format: str = None, delta: timedelta = None):
     timestamp = datetime.now()
@@ -143,16 +177,13 @@ def format_decimal(report, amount: float, amount_format="#,##0.00"):
     :param amount_format: an optional format to use
     """
     lang = report._context.get("lang") or "en_US"
-    return babel.numbers.format_decimal(amount, format=amount_format, locale=lang)
+    return babel.numbers.format_decimal(
+        amount, format=get_number_pattern(amount_format), locale=get_locale(lang)
+    )
 
 
 def get_locale_from_odoo_lang_and_country(lang: str, country: "res.country"):
-    locale = "{}_{}".format(lang.split("_")[0], country.code)
-
-    if not localedata.exists(locale):
-        locale = lang
-
-    return locale
+    return get_locale_from_lang_and_country_code(lang, country.code)
 
 
 @aeroo_util("format_currency")
@@ -184,7 +215,10 @@ def format_currency(
         )
 
     return babel.numbers.format_currency(
-        amount, currency.name, format=amount_format, locale=locale
+        amount,
+        currency.name,
+        format=get_number_pattern(amount_format),
+        locale=get_locale(locale),
     )
 
 
@@ -197,33 +231,145 @@ def asimage(
     size_y: int = None,
     uom: str = "px",
     hold_ratio: bool = False,
+    field: str = None,
 ):
-    def size_by_uom(val, uom, dpi):
-        if uom == "px":
-            result = str(val / dpi) + "in"
-        elif uom == "cm":
-            result = str(val / 2.54) + "in"
-        elif uom == "in":
-            result = str(val) + "in"
-        return result
+    if isinstance(field_value, models.BaseModel):
+        field_value = _read_image_variant(
+            field_value, field or "image_1920", size_x, size_y, uom, hold_ratio
+        )
 
     if not field_value:
         return BytesIO(), "image/png"
 
-    field_value = base64.decodebytes(field_value)
-    tf = BytesIO(field_value)
-    tf.seek(0)
-    im = Image.open(tf)
-    format = im.format.lower()
-    dpi_x, dpi_y = map(float, im.info.get("dpi", (96, 96)))
+    return _get_cached_image(
+        (
+            "asimage",
+            hashlib.sha1(field_value).hexdigest(),
+            rotate,
+            size_x,
+            size_y,
+            uom,
+            hold_ratio,
+        ),
+        lambda: _make_image(field_value, rotate, size_x, size_y, uom, hold_ratio),
+    )
+
+
+IMAGE_VARIANT_SIZES = (128, 256, 512, 1024, 1920)
+
+
+def _read_image_variant(record, field, size_x, size_y, uom, hold_ratio):
+    """Read the smallest variant of an image field sufficient for its printed size.
+
+    The variants of an image field are the fields named after the same prefix
+    and the maximum size of the image (i.e. image_128, image_256, ..., image_1920).
+    A variant larger than the given field is never read.
+
+    The variant is only selected when the printed size of the image is given.
+    Otherwise, the size of the image in the document would depend on the variant.
+
+    :param record: the record containing the image
+    :param field: the name of the image field or of the family of image fields (i.e. image)
+    :return: the value of the selected field
+    """
+    match = re.match(r"^(.+)_(\d+)$", field)
+    prefix, max_size = (match.group(1), int(match.group(2))) if match else (field, None)
+    variants = [
+        (size, "{}_{}".format(prefix, size))
+        for size in IMAGE_VARIANT_SIZES
+        if (max_size is None or size <= max_size)
+        and "{}_{}".format(prefix, size) in record._fields
+    ]
+
+    if not variants:
+        return record[field]
+
+    largest_variant = variants[-1][1]
+
+    if not (size_x and size_y or hold_ratio and (size_x or size_y)):
+        return record[largest_variant]
+
+    required_size = _get_image_required_size(
+        record[variants[0][1]], size_x, size_y, uom, hold_ratio
+    )
+    variant = next(
+        (variant for size, variant in variants if size >= required_size),
+        largest_variant,
+    )
+    return record[variant]
+
+
+def _get_image_required_size(smallest_value, size_x, size_y, uom, hold_ratio):
+    """Get the size in pixels required for the largest side of a printed image.
+
+    The printed size is computed from the smallest variant of the image,
+    as done by _make_image, at the resolution given by aeroo_image_dpi.
+    """
+    if not smallest_value:
+        return 0
+
+    image = Image.open(BytesIO(base64.decodebytes(smallest_value)))
+    inches_x, inches_y = _get_image_printed_size(
+        image, size_x, size_y, uom, hold_ratio
+    )
+    return max(inches_x, inches_y) * _get_image_dpi()
+
+
+def _make_image(field_value, rotate, size_x, size_y, uom, hold_ratio):
+    """Make the image inserted in a document for a binary field value.
+
+    The image is downscaled to the resolution given by the server option
+    aeroo_image_dpi for the size of its frame. The size of the frame
+    is the same as for the original image.
+
+    :return: a tuple (image bytes, mimetype, size_x, size_y)
+    """
+    data = base64.decodebytes(field_value)
+    im = Image.open(BytesIO(data))
+    image_format = im.format.lower()
+
+    inches_x, inches_y = _get_image_printed_size(im, size_x, size_y, uom, hold_ratio)
+    size_x = str(inches_x) + "in"
+    size_y = str(inches_y) + "in"
+
+    target_size = _get_image_target_size(im, inches_x, inches_y)
+
+    if rotate is None and target_size == im.size:
+        return data, "image/%s" % image_format, size_x, size_y
+
+    # Jpeg images are decoded directly at a reduced scale, close to the target size.
+    im.draft(im.mode, target_size)
 
     if rotate is not None:
         im = im.rotate(int(rotate))
-        tf.seek(0)
-        im.save(tf, format)
+
+    if im.size != target_size:
+        if im.mode in ("1", "P"):
+            im = im.convert("RGBA")
+        im = im.resize(target_size, Image.LANCZOS)
+
+    stream = BytesIO()
+    if image_format == "jpeg":
+        im.save(stream, "jpeg", quality=90)
+    else:
+        image_format = "png"
+        im.save(stream, "png")
+
+    return stream.getvalue(), "image/%s" % image_format, size_x, size_y
+
+
+def _get_image_printed_size(image, size_x, size_y, uom, hold_ratio):
+    """Get the size in inches of an image printed in a document.
+
+    A side that is not given is deduced from the ratio of the image
+    if hold_ratio is set, otherwise from the resolution of the image.
+
+    :return: a tuple (width, height) in inches
+    """
+    dpi_x, dpi_y = map(float, image.info.get("dpi", (96, 96)))
 
     if hold_ratio:
-        img_ratio = im.size[0] / float(im.size[1])  # width / height
+        img_ratio = image.size[0] / float(image.size[1])  # width / height
         if size_x and not size_y:
             size_y = size_x / img_ratio
         elif not size_x and size_y:
@@ -236,13 +382,83 @@ def asimage(
             elif size_x2 > size_x:
                 size_y = size_y2
 
-    size_x = (
-        size_x and size_by_uom(size_x, uom, dpi_x) or str(im.size[0] / dpi_x) + "in"
-    )
-    size_y = (
-        size_y and size_by_uom(size_y, uom, dpi_y) or str(im.size[1] / dpi_y) + "in"
+    inches_x = _size_in_inches(size_x, uom, dpi_x) if size_x else image.size[0] / dpi_x
+    inches_y = _size_in_inches(size_y, uom, dpi_y) if size_y else image.size[1] / dpi_y
+    return inches_x, inches_y
+
+
+def _size_in_inches(value, uom, dpi):
+    if uom == "px":
+        return value / dpi
+    elif uom == "cm":
+        return value / 2.54
+    elif uom == "in":
+        return value
+    raise ValidationError(_("The unit of measure {} is not supported.").format(uom))
+
+
+def _get_image_dpi():
+    """Get the resolution in dots per inch of the images inserted in reports."""
+    return float(config.get("aeroo_image_dpi") or 300)
+
+
+def _get_image_target_size(image, inches_x, inches_y):
+    """Get the size in pixels of an image printed at the resolution of the reports.
+
+    Images are only downscaled. Animated images are kept at their size.
+
+    :param image: the original image
+    :param float inches_x: the printed width of the image
+    :param float inches_y: the printed height of the image
+    :return: a tuple (width, height) in pixels
+    """
+    dpi = _get_image_dpi()
+    width, height = image.size
+
+    if getattr(image, "is_animated", False):
+        return width, height
+
+    return (
+        min(width, max(1, round(inches_x * dpi))),
+        min(height, max(1, round(inches_y * dpi))),
     )
-    return tf, "image/%s" % format, size_x, size_y
+
+
+image_cache = LRUCache(
+    max_size=int(config.get("aeroo_image_cache_size") or 32) * 1024 * 1024,
+    sizeof=lambda entry: len(entry[0]),
+)
+
+
+def get_image_cache_stats():
+    """Get the statistics of the cache of generated images, barcodes and QR codes.
+
+    :rtype: dict
+    """
+    return image_cache.stats()
+
+
+def _get_cached_image(key, factory):
+    """Get a generated image from the cache.
+
+    :param key: the parameters identifying the image
+    :param factory: a function without parameter returning a tuple
+        (image bytes, mimetype, size_x, size_y)
+    :return: a tuple (stream, mimetype, size_x, size_y)
+    """
+    data, mimetype, size_x, size_y = image_cache.get_or_set(key, factory)
+    return BytesIO(data), mimetype, size_x, size_y
+
+
+def _use_vector_images(report, vector):
+    """Evaluate whether a barcode must be generated as a vector image.
+
+    :param report: the aeroo report
+    :param vector: the value given in the template or None to use the report option
+    """
+    if vector is None:
+        return bool(report.aeroo_vector_barcodes)
+    return bool(vector)
 
 
 @aeroo_util("barcode")
@@ -253,37 +469,83 @@ def barcode(
     height: int = 50,
     rotate: bool = None,
     xw: int = 1,
+    vector: bool = None,
 ):
-    if code:
-        if code_type.lower() == "ean13":
-            bar = EanBarCode()
-            im = bar.getImage(code, height)
-        elif code_type.lower() == "code128":
-            im = get_code(code, xw, height)
-        elif code_type.lower() == "code39":
-            im = create_c39(height, xw, code)
-    else:
+    if not code:
         return BytesIO(), "image/png"
 
+    vector = _use_vector_images(report, vector)
+    return _get_cached_image(
+        ("barcode", code, code_type.lower(), height, rotate, xw, vector),
+        lambda: _make_barcode(code, code_type, height, rotate, xw, vector),
+    )
+
+
+def _make_barcode(code, code_type, height, rotate, xw, vector=False):
+    if vector:
+        return _make_vector_barcode(code, code_type, height, xw)
+
+    if code_type.lower() == "ean13":
+        bar = EanBarCode()
+        im = bar.getImage(code, height)
+    elif code_type.lower() == "code128":
+        im = get_code(code, xw, height)
+    elif code_type.lower() == "code39":
+        im = create_c39(height, xw, code)
+
     stream = _stream_image(im)
 
     if rotate is not None:
         im = im.rotate(int(rotate))
 
     size_x, size_y = _get_image_size(im)
-    return stream, "image/png", size_x, size_y
+    return stream.getvalue(), "image/png", size_x, size_y
+
+
+def _make_vector_barcode(code, code_type, height, xw):
+    if code_type.lower() == "ean13":
+        layout = EanBarCode().getLayout(code, height)
+    elif code_type.lower() == "code128":
+        layout = get_code_layout(code, xw, height)
+    elif code_type.lower() == "code39":
+        layout = layout_c39(height, xw, code)
+
+    return _make_vector_image(layout)
 
 
 @aeroo_util("qrcode")
-def qrcode(report, code, size=None):
-    image = make_qr_code(code)
+def qrcode(report, code, size=None, vector: bool = None):
+    vector = _use_vector_images(report, vector)
+    return _get_cached_image(
+        ("qrcode", code, size, vector), lambda: _make_qr_code(code, size, vector)
+    )
 
-    if size is None:
-        size_x, size_y = _get_image_size(image)
+
+def _make_qr_code(code, size, vector=False):
+    if vector:
+        data, mimetype, size_x, size_y = _make_vector_image(get_qr_layout(code))
     else:
+        image = make_qr_code(code)
+        data, mimetype = _stream_image(image).getvalue(), "image/png"
+        size_x, size_y = _get_image_size(image)
+
+    if size is not None:
         size_x, size_y = size, size
 
-    return _stream_image(image), "image/png", size_x, size_y
+    return data, mimetype, size_x, size_y
+
+
+def _make_vector_image(layout):
+    """Draw the layout of a barcode as an SVG image.
+
+    The image has the same size as the png image of the barcode.
+    """
+    return (
+        render_svg(layout),
+        "image/svg+xml",
+        _to_inches(layout.width),
+        _to_inches(layout.height),
+    )
 
 
 def _stream_image(image):
@@ -0,0 +1,99 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+"""Cached objects used by the formatting functions of aeroo templates.
+
+Babel parses the locale and the pattern given to its formatting functions
+on every call. The parsed objects are immutable, so that they can be shared
+between every amount and date printed in a worker.
+"""
+
+from functools import lru_cache
+
+import pytz
+from babel import Locale, UnknownLocaleError
+from babel.core import localedata
+from babel.dates import parse_pattern as parse_datetime_pattern
+from babel.numbers import parse_pattern as parse_number_pattern
+
+# Date formats resolved by babel from the data of the locale.
+NAMED_DATETIME_FORMATS = ("full", "long", "medium", "short")
+
+
+@lru_cache(maxsize=256)
+def get_locale(identifier):
+    """Get the babel locale for the given identifier.
+
+    :param str identifier: the identifier of the locale (i.e. fr_CA)
+    :rtype: babel.Locale
+    """
+    return Locale.parse(identifier)
+
+
+@lru_cache(maxsize=1024)
+def get_locale_from_lang_and_country_code(lang, country_code):
+    """Get the identifier of the locale of a language in a country.
+
+    The language is used if babel has no data for the country.
+
+    :param str lang: the code of the language (i.e. fr_FR)
+    :param str country_code: the code of the country (i.e. CA)
+    :rtype: str
+    """
+    locale = "{}_{}".format(lang.split("_")[0], country_code)
+    return locale if localedata.exists(locale) else lang
+
+
+def get_number_pattern(pattern):
+    """Get the parsed number pattern for the given format.
+
+    :param pattern: the format or None to use the format of the locale
+    :return: the parsed pattern or None
+    """
+    return _parse_number_pattern(pattern) if pattern else pattern
+
+
+@lru_cache(maxsize=1024)
+def _parse_number_pattern(pattern):
+    return parse_number_pattern(pattern)
+
+
+def get_datetime_pattern(pattern):
+    """Get the parsed date pattern for the given format.
+
+    Named formats (i.e. medium) depend on the locale, so they are not parsed.
+
+    :param pattern: the format of the date
+    :return: the parsed pattern or the named format
+    """
+    if pattern is None or pattern in NAMED_DATETIME_FORMATS:
+        return pattern
+    return _parse_datetime_pattern(pattern)
+
+
+@lru_cache(maxsize=1024)
+def _parse_datetime_pattern(pattern):
+    return parse_datetime_pattern(pattern)
+
+
+@lru_cache(maxsize=256)
+def get_timezone(name):
+    """Get the timezone with the given name.
+
+    :param str name: the name of the timezone (i.e. America/Montreal)
+    :raises pytz.UnknownTimeZoneError: if the timezone does not exist
+    """
+    return pytz.timezone(name)
+
+
+def preload_locales(identifiers):
+    """Load the data of the given locales, so that the first report is not slower.
+
+    :param identifiers: the identifiers of the locales
+    """
+    for identifier in identifiers:
+        try:
+            # The data of a locale is loaded on first access.
+            get_locale(identifier).number_symbols
+        except (ValueError, UnknownLocaleError):
+            continue
@@ -0,0 +1,581 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+import fcntl
+import json
+import logging
+import os
+import random
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+FILTER_NAMES = {
+    ("odt", "pdf"): "writer_pdf_Export",
+    ("ods", "pdf"): "calc_pdf_Export",
+    ("odt", "doc"): "MS Word 97",
+    ("odt", "docx"): "MS Word 2007 XML",
+    ("ods", "xls"): "MS Excel 97",
+    ("ods", "xlsx"): "Calc MS Excel 2007 XML",
+    ("ods", "csv"): "Text - txt - csv (StarCalc)",
+}
+
+
+class LibreofficeError(Exception):
+    """Error raised when a document could not be converted by Libreoffice."""
+
+    def __init__(self, message, index=None):
+        """Initialize the error.
+
+        :param message: the error message
+        :param index: when converting multiple documents, the index of the document
+            that could not be converted
+        """
+        super().__init__(message)
+        self.index = index
+
+
+class LibreofficeConverter(object):
+    """Base class of the Libreoffice conversion backends."""
+
+    def convert(self, data, in_format, output_format, timeout):
+        """Convert the given document to the output format.
+
+        :param bytes data: the document to convert
+        :param str in_format: the format of the given document (odt, ods)
+        :param str output_format: the format of the returned document
+        :param int timeout: the timeout of the conversion in seconds
+        :return: the converted document
+        :rtype: bytes
+        """
+        raise NotImplementedError()
+
+    def convert_many(self, documents, in_format, output_format, timeout):
+        """Convert multiple documents to the output format.
+
+        :param list documents: the documents to convert
+        :param str in_format: the format of the given documents (odt, ods)
+        :param str output_format: the format of the returned documents
+        :param int timeout: the timeout of the conversion of each document in seconds
+        :return: the converted documents in the same order as the given documents
+        :rtype: list
+        """
+        outputs = []
+
+        for index, data in enumerate(documents):
+            try:
+                outputs.append(self.convert(data, in_format, output_format, timeout))
+            except LibreofficeError as exc:
+                raise LibreofficeError(str(exc), index=index)
+
+        return outputs
+
+
+class LibreofficeCommandLine(LibreofficeConverter):
+    """Convert documents by running a headless Libreoffice process.
+
+    Multiple documents are converted with a single Libreoffice process.
+    """
+
+    def convert(self, data, in_format, output_format, timeout):
+        try:
+            return self.convert_many([data], in_format, output_format, timeout)[0]
+        except LibreofficeError as exc:
+            raise LibreofficeError(str(exc))
+
+    def convert_many(self, documents, in_format, output_format, timeout):
+        with tempfile.TemporaryDirectory(prefix="aeroo-") as directory:
+            input_files = []
+
+            for index, data in enumerate(documents):
+                input_file = os.path.join(
+                    directory, "report_{}.{}".format(index, in_format)
+                )
+                with open(input_file, "wb") as f:
+                    f.write(data)
+                input_files.append(input_file)
+
+            cmd = [
+                "libreoffice",
+                "--headless",
+                "--convert-to",
+                output_format,
+                "--outdir",
+                directory,
+                *input_files,
+            ]
+
+            try:
+                subprocess.call(cmd, timeout=timeout * len(documents))
+            except Exception as exc:
+                raise LibreofficeError(exc)
+
+            outputs = []
+            for index, input_file in enumerate(input_files):
+                output_file = input_file[: -len(in_format)] + output_format
+                try:
+                    outputs.append(_read_output_file(output_file))
+                except LibreofficeError as exc:
+                    raise LibreofficeError(str(exc), index=index)
+
+            return outputs
+
+
+class LibreofficeDaemonPool(LibreofficeConverter):
+    """Convert documents using a pool of long-lived headless Libreoffice instances.
+
+    Each instance listens on a named UNIX pipe and is driven through the UNO bridge.
+    The state of the pool is kept in a directory shared by all Odoo workers
+    of the host. A lock file per instance ensures that an instance converts
+    a single document at a time, whatever the worker using it.
+
+    The first worker that needs an instance which is not running starts it.
+    An instance is recycled after a given number of conversions or when its
+    resident memory exceeds a given limit.
+    """
+
+    def __init__(self, size=2, max_conversions=200, max_memory=1024, directory=None):
+        """Initialize the pool.
+
+        :param int size: the number of Libreoffice instances
+        :param int max_conversions: the number of conversions before an instance
+            is restarted
+        :param int max_memory: the resident memory (in MB) above which an instance
+            is restarted
+        :param str directory: the directory containing the state of the pool
+        """
+        self.size = max(size, 1)
+        self.max_conversions = max_conversions
+        self.max_memory = max_memory
+        self.directory = directory or os.path.join(
+            tempfile.gettempdir(), "report_aeroo"
+        )
+        os.makedirs(self.directory, exist_ok=True)
+
+    def convert(self, data, in_format, output_format, timeout):
+        filter_name = FILTER_NAMES.get((in_format, output_format))
+        if filter_name is None:
+            raise LibreofficeError(
+                "No Libreoffice export filter defined to convert {} to {}.".format(
+                    in_format, output_format
+                )
+            )
+
+        with self._acquire_instance(timeout) as instance:
+            try:
+                output = instance.convert(
+                    data, in_format, output_format, filter_name, timeout
+                )
+            except Exception as exc:
+                instance.stop()
+                raise LibreofficeError(exc)
+
+            instance.conversions += 1
+            if self._should_recycle(instance):
+                instance.stop()
+            else:
+                instance.save_state()
+
+        return output
+
+    def _should_recycle(self, instance):
+        if instance.conversions >= self.max_conversions:
+            return True
+        return instance.get_memory() > self.max_memory * 1024 * 1024
+
+    @contextmanager
+    def _acquire_instance(self, timeout):
+        """Lock a free Libreoffice instance of the pool.
+
+        The instances are tried in a random order, so that concurrent
+        workers do not all wait behind the first instance.
+        """
+        instances = [LibreofficeInstance(self.directory, i) for i in range(self.size)]
+        random.shuffle(instances)
+        deadline = time.monotonic() + timeout
+
+        while True:
+            for instance in instances:
+                if instance.lock():
+                    try:
+                        instance.ensure_started(timeout)
+                        yield instance
+                    finally:
+                        instance.unlock()
+                    return
+
+            if time.monotonic() > deadline:
+                raise LibreofficeError(
+                    "No Libreoffice instance available after {} seconds.".format(
+                        timeout
+                    )
+                )
+
+            time.sleep(0.05)
+
+
+class LibreofficeInstance(object):
+    """A headless Libreoffice process of the daemon pool."""
+
+    def __init__(self, directory, index):
+        self.name = "aeroo_{}_{}".format(os.getuid(), index)
+        self.profile = os.path.join(directory, "profile_{}".format(index))
+        self._lock_path = os.path.join(directory, "instance_{}.lock".format(index))
+        self._state_path = os.path.join(directory, "instance_{}.json".format(index))
+        self._lock_file = None
+        self.pid = None
+        self.start_time = None
+        self.conversions = 0
+
+    @property
+    def connection_string(self):
+        return "pipe,name={};urp;StarOffice.ComponentContext".format(self.name)
+
+    def lock(self):
+        """Try to acquire the lock of the instance without blocking.
+
+        :return: whether the lock was acquired
+        """
+        lock_file = open(self._lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._lock_file = lock_file
+        self._load_state()
+        return True
+
+    def unlock(self):
+        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._lock_file.close()
+        self._lock_file = None
+
+    def _load_state(self):
+        try:
+            with open(self._state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+
+        self.pid = state.get("pid")
+        self.start_time = state.get("start_time")
+        self.conversions = state.get("conversions", 0)
+
+    def save_state(self):
+        with open(self._state_path, "w") as f:
+            json.dump(
+                {
+                    "pid": self.pid,
+                    "start_time": self.start_time,
+                    "conversions": self.conversions,
+                },
+                f,
+            )
+
+    def is_running(self):
+        """Check whether the Libreoffice process of the instance is running.
+
+        The state of the instance survives a restart of the host. Therefore,
+        its pid may have been reused by an unrelated process. The process
+        is only considered as the instance if it was started at the same time
+        with the profile of the instance.
+        """
+        if not self.pid:
+            return False
+        self._reap()
+        return (
+            self.start_time is not None
+            and _get_process_start_time(self.pid) == self.start_time
+            and self._profile_argument in _get_process_arguments(self.pid)
+        )
+
+    @property
+    def _profile_argument(self):
+        return "-env:UserInstallation=file://{}".format(self.profile)
+
+    def _reap(self):
+        """Collect the exit status of the instance if it was started by this worker.
+
+        Otherwise, a stopped instance would remain a zombie process
+        and would still be considered as running.
+        """
+        try:
+            os.waitpid(self.pid, os.WNOHANG)
+        except ChildProcessError:
+            pass
+
+    def ensure_started(self, timeout):
+        if self.is_running():
+            return
+
+        logger.info("Starting the Libreoffice instance %s.", self.name)
+        process = subprocess.Popen(
+            [
+                "soffice",
+                "--headless",
+                "--invisible",
+                "--nocrashreport",
+                "--nodefault",
+                "--nologo",
+                "--nofirststartwizard",
+                "--norestore",
+                self._profile_argument,
+                "--accept={}".format(self.connection_string),
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        self.pid = process.pid
+        self.start_time = _get_process_start_time(process.pid)
+        self.conversions = 0
+        self.save_state()
+        self._wait_until_ready(timeout)
+
+    def _wait_until_ready(self, timeout):
+        try:
+            self._wait_for_connection(timeout)
+        except Exception:
+            self.stop()
+            raise
+
+    def _wait_for_connection(self, timeout):
+        """Connect to the instance until it accepts the connection.
+
+        Only a refused connection is retried. Any other error (for example,
+        the uno module not installed) is raised without waiting for the timeout.
+        """
+        import uno  # noqa: F401 (required before importing com.sun.star)
+        from com.sun.star.connection import NoConnectException
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self._connect()
+                return
+            except NoConnectException:
+                if time.monotonic() > deadline:
+                    raise LibreofficeError(
+                        "The Libreoffice instance {} did not start.".format(self.name)
+                    )
+                time.sleep(0.1)
+
+    def stop(self):
+        """Stop the Libreoffice process of the instance."""
+        if self.is_running():
+            logger.info("Stopping the Libreoffice instance %s.", self.name)
+            self._kill()
+            self._reap()
+
+        self.pid = None
+        self.start_time = None
+        self.conversions = 0
+        self.save_state()
+
+    def _kill(self):
+        """Kill the processes of the instance.
+
+        The instance is started in its own session, so that the launcher
+        and the soffice.bin process it forks are in the same process group.
+        """
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    def get_memory(self):
+        """Get the resident memory of the Libreoffice processes in bytes.
+
+        The pid of the instance is the one of the launcher. The documents
+        are loaded by the soffice.bin process it forks. Therefore, the memory
+        of every process of the group of the instance is summed.
+        """
+        resident_pages = 0
+        for pid in _iter_process_group(self.pid):
+            try:
+                with open("/proc/{}/statm".format(pid)) as f:
+                    resident_pages += int(f.read().split()[1])
+            except (OSError, ValueError, IndexError):
+                continue
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+    def _connect(self):
+        import uno
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context
+        )
+        context = resolver.resolve("uno:" + self.connection_string)
+        return context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", context
+        )
+
+    def convert(self, data, in_format, output_format, filter_name, timeout):
+        """Convert a document with the instance.
+
+        The calls to the UNO bridge have no timeout. If the conversion
+        is not done before the timeout, the instance is killed, so that
+        the calls blocked on the bridge fail.
+
+        :param int timeout: the timeout of the conversion in seconds
+        """
+        timed_out = threading.Event()
+
+        def kill_on_timeout():
+            timed_out.set()
+            self._kill()
+
+        watchdog = threading.Timer(timeout, kill_on_timeout)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            return self._convert_document(data, in_format, output_format, filter_name)
+        except Exception:
+            if timed_out.is_set():
+                raise LibreofficeError(
+                    "The Libreoffice instance {} did not convert the document "
+                    "within {} seconds.".format(self.name, timeout)
+                )
+            raise
+        finally:
+            watchdog.cancel()
+
+    def _convert_document(self, data, in_format, output_format, filter_name):
+        import uno
+
+        desktop = self._connect()
+
+        with tempfile.TemporaryDirectory(prefix="aeroo-") as directory:
+            input_file = os.path.join(directory, "report." + in_format)
+            output_file = os.path.join(directory, "report." + output_format)
+
+            with open(input_file, "wb") as f:
+                f.write(data)
+
+            document = desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(input_file),
+                "_blank",
+                0,
+                _make_properties(Hidden=True, ReadOnly=True),
+            )
+            try:
+                document.storeToURL(
+                    uno.systemPathToFileUrl(output_file),
+                    _make_properties(FilterName=filter_name, Overwrite=True),
+                )
+            finally:
+                document.close(True)
+
+            return _read_output_file(output_file)
+
+
+def _make_properties(**values):
+    from com.sun.star.beans import PropertyValue
+
+    properties = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        properties.append(prop)
+    return tuple(properties)
+
+
+def _get_process_stat(pid):
+    """Get the fields of /proc/<pid>/stat that follow the command name.
+
+    The command name is between parentheses and may contain spaces.
+
+    :return: the list of fields, starting with the state of the process
+    """
+    try:
+        with open("/proc/{}/stat".format(pid)) as f:
+            stat = f.read()
+    except OSError:
+        return []
+    return stat[stat.rfind(")") + 2 :].split()
+
+
+def _get_process_start_time(pid):
+    """Get the time when a process started, in clock ticks after boot.
+
+    :return: the start time or None if the process does not exist
+    """
+    fields = _get_process_stat(pid)
+    return int(fields[19]) if len(fields) > 19 else None
+
+
+def _get_process_arguments(pid):
+    """Get the command line arguments of a process.
+
+    :return: the list of arguments, empty if the process does not exist
+    """
+    try:
+        with open("/proc/{}/cmdline".format(pid), "rb") as f:
+            cmdline = f.read()
+    except OSError:
+        return []
+    return [arg.decode(errors="replace") for arg in cmdline.split(b"\0") if arg]
+
+
+def _iter_process_group(pgid):
+    """Iterate over the pids of the processes of a process group."""
+    for name in os.listdir("/proc"):
+        if name.isdigit():
+            fields = _get_process_stat(name)
+            if len(fields) > 2 and int(fields[2]) == pgid:
+                yield int(name)
+
+
+def _read_output_file(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        raise LibreofficeError("Libreoffice did not produce the converted document.")
+
+
+_converters = {}
+
+
+def get_converter(config):
+    """Get the Libreoffice conversion backend defined in the server configuration.
+
+    The backend is selected with the option `aeroo_libreoffice_backend`
+    of the Odoo configuration file:
+
+    * cli (default): one Libreoffice process is started per document.
+    * daemon: documents are converted by a pool of long-lived Libreoffice instances.
+
+    :param config: the Odoo server configuration
+    """
+    backend = config.get("aeroo_libreoffice_backend") or "cli"
+
+    if backend == "daemon":
+        key = (
+            backend,
+            int(config.get("aeroo_libreoffice_pool_size") or 2),
+            int(config.get("aeroo_libreoffice_max_conversions") or 200),
+            int(config.get("aeroo_libreoffice_max_memory") or 1024),
+            config.get("aeroo_libreoffice_pool_dir") or None,
+        )
+    else:
+        key = ("cli",)
+
+    if key not in _converters:
+        _converters[key] = (
+            LibreofficeDaemonPool(*key[1:])
+            if key[0] == "daemon"
+            else LibreofficeCommandLine()
+        )
+
+    return _converters[key]
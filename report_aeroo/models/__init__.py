@@ -5,6 +5,8 @@
 from . import (
     aeroo_filename_line,
     aeroo_mimetype,
+    aeroo_render_job,
+    aeroo_render_stat,
     aeroo_template_line,
     ir_actions_report,
     mail_template,
@@ -0,0 +1,256 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+import json
+import logging
+import time
+import traceback
+from io import BytesIO
+from odoo import api, fields, models
+from odoo.tools import config
+
+logger = logging.getLogger(__name__)
+
+# Description of the intermediate documents rendered for a chunk of records.
+CHUNK_DESCRIPTION = "aeroo_render_job_chunk"
+
+
+class AerooRenderJob(models.Model):
+    """A report rendered in background for a large number of records.
+
+    The records are rendered by chunks by a scheduled action.
+    Each chunk is committed as an intermediate pdf attachment,
+    so that a job is never limited by the time or memory limits of a worker.
+
+    When every chunk is rendered, the intermediate documents are merged
+    into the final attachment of the job.
+    """
+
+    _name = "aeroo.render.job"
+    _description = "Aeroo Render Job"
+    _order = "id desc"
+
+    name = fields.Char(required=True, readonly=True)
+    report_id = fields.Many2one(
+        "ir.actions.report", "Report", required=True, readonly=True, ondelete="cascade"
+    )
+    user_id = fields.Many2one(
+        "res.users",
+        "User",
+        required=True,
+        readonly=True,
+        default=lambda self: self.env.user,
+    )
+    state = fields.Selection(
+        [
+            ("pending", "Pending"),
+            ("running", "Running"),
+            ("done", "Done"),
+            ("failed", "Failed"),
+        ],
+        required=True,
+        readonly=True,
+        default="pending",
+    )
+    record_ids = fields.Text(required=True, readonly=True)
+    data = fields.Text(readonly=True, default="{}")
+    context = fields.Text(readonly=True, default="{}")
+    record_count = fields.Integer(readonly=True)
+    processed_count = fields.Integer(readonly=True)
+    attempt_count = fields.Integer(
+        readonly=True,
+        help="The number of times the next chunk of the job was started "
+        "without being committed.",
+    )
+    progress = fields.Float(compute="_compute_progress")
+    attachment_id = fields.Many2one("ir.attachment", "Attachment", readonly=True)
+    output = fields.Binary(related="attachment_id.datas")
+    output_filename = fields.Char(related="attachment_id.name")
+    error = fields.Text(readonly=True)
+    date_done = fields.Datetime(readonly=True)
+
+    @api.depends("record_count", "processed_count")
+    def _compute_progress(self):
+        for job in self:
+            job.progress = (
+                100.0 * job.processed_count / job.record_count
+                if job.record_count
+                else 0.0
+            )
+
+    @api.model
+    def create_job(self, report, doc_ids, data=None):
+        """Create a job rendering the given report in background.
+
+        The job is rendered with the user and the context of the current environment.
+
+        :param report: the aeroo report to render
+        :param list doc_ids: the ids of the records
+        :param dict data: the data to send to the report as context
+        :return: the new job
+        """
+        job = self.create(
+            {
+                "name": report.name,
+                "report_id": report.id,
+                "record_ids": json.dumps(doc_ids),
+                "data": json.dumps(data or {}),
+                "context": json.dumps(dict(self.env.context)),
+                "record_count": len(doc_ids),
+            }
+        )
+        self.env.ref("report_aeroo.cron_process_aeroo_render_jobs").sudo()._trigger()
+        return job
+
+    @api.model
+    def _cron_process_jobs(self):
+        """Process pending jobs until the time budget of the scheduled action is spent.
+
+        A chunk of records is rendered and committed at a time.
+        Therefore, a job interrupted by the time limit of the scheduled action
+        resumes from its last committed chunk.
+
+        The attempt is committed before rendering a chunk. A job whose chunk
+        was interrupted too many times (i.e. a chunk always exceeding the time
+        limit of the worker) is marked as failed, so that it does not block
+        the next jobs.
+        """
+        deadline = time.time() + self._get_time_budget()
+        max_attempts = self._get_max_attempts()
+
+        while time.time() < deadline:
+            job = self.search(
+                [("state", "in", ("pending", "running"))], order="id", limit=1
+            )
+            if not job:
+                break
+
+            if job.attempt_count >= max_attempts:
+                logger.error(
+                    "The aeroo render job %s was interrupted %s times.",
+                    job.id,
+                    job.attempt_count,
+                )
+                job._mark_failed(
+                    "The rendering of the job was interrupted {} times, "
+                    "probably by the time or memory limits of the server.".format(
+                        job.attempt_count
+                    )
+                )
+            else:
+                job.attempt_count += 1
+                self.env.cr.commit()
+                job._process_next_chunk()
+
+            self.env.cr.commit()
+
+    def _process_next_chunk(self):
+        self.ensure_one()
+        try:
+            with self.env.cr.savepoint():
+                if self.processed_count < self.record_count:
+                    self._render_next_chunk()
+                else:
+                    self._merge_chunks()
+        except Exception:
+            logger.exception("The aeroo render job %s failed.", self.id)
+            self._mark_failed(traceback.format_exc())
+
+    def _mark_failed(self, error):
+        self.write({"state": "failed", "error": error})
+        self._get_chunk_attachments().unlink()
+
+    def _render_next_chunk(self):
+        doc_ids = json.loads(self.record_ids)
+        chunk_ids = doc_ids[
+            self.processed_count : self.processed_count + self._get_chunk_size()
+        ]
+
+        report = self._get_report()
+        output_format = report.aeroo_out_format_id.code
+        outputs = report._render_aeroo_records(
+            chunk_ids, json.loads(self.data), output_format
+        )
+        output = report._merge_aeroo_pdf(outputs)
+
+        self._create_attachment(
+            "chunk_{:06d}.pdf".format(self.processed_count), output, CHUNK_DESCRIPTION
+        )
+
+        self.write(
+            {
+                "state": "running",
+                "processed_count": self.processed_count + len(chunk_ids),
+                "attempt_count": 0,
+            }
+        )
+
+    def _merge_chunks(self):
+        chunks = self._get_chunk_attachments()
+        report = self._get_report()
+
+        output = BytesIO()
+        report._merge_aeroo_pdf((chunk.raw for chunk in chunks), output)
+
+        attachment = self._create_attachment(
+            "{}.pdf".format(self.name), output.getvalue()
+        )
+        chunks.unlink()
+        self.write(
+            {
+                "state": "done",
+                "attachment_id": attachment.id,
+                "attempt_count": 0,
+                "date_done": fields.Datetime.now(),
+            }
+        )
+
+    def _get_report(self):
+        """Get the report of the job in the environment of the user who created it."""
+        context = json.loads(self.context)
+        return self.report_id.with_user(self.user_id).with_context(**context)
+
+    def _get_chunk_attachments(self):
+        return self.env["ir.attachment"].search(
+            [
+                ("res_model", "=", self._name),
+                ("res_id", "=", self.id),
+                ("description", "=", CHUNK_DESCRIPTION),
+            ],
+            order="name",
+        )
+
+    def _create_attachment(self, name, data, description=None):
+        return self.env["ir.attachment"].create(
+            {
+                "name": name,
+                "raw": data,
+                "res_model": self._name,
+                "res_id": self.id,
+                "mimetype": "application/pdf",
+                "description": description,
+            }
+        )
+
+    def _get_chunk_size(self):
+        """Get the number of records rendered and committed at a time."""
+        return int(config.get("aeroo_render_job_chunk_size") or 100)
+
+    def _get_time_budget(self):
+        """Get the time in seconds spent by the scheduled action on pending jobs.
+
+        A chunk is only started before the end of the time budget. Therefore,
+        the budget is at most half of the time limit of the scheduled actions,
+        so that the last chunk can be rendered before reaching the limit.
+        """
+        budget = int(config.get("aeroo_render_job_time_budget") or 60)
+
+        time_limit = config.get("limit_time_real_cron") or -1
+        if time_limit < 0:
+            time_limit = config.get("limit_time_real") or 0
+
+        return min(budget, time_limit / 2) if time_limit > 0 else budget
+
+    def _get_max_attempts(self):
+        """Get the number of times a chunk is started before the job fails."""
+        return int(config.get("aeroo_render_job_max_attempts") or 3)
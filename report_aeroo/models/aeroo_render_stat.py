@@ -0,0 +1,141 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+import logging
+from datetime import timedelta
+from odoo import api, fields, models
+from odoo.tools import config
+
+from ..render_stat import render_stat_buffer
+
+logger = logging.getLogger(__name__)
+
+
+class AerooRenderStat(models.Model):
+    """The statistics of a rendering of an aeroo report.
+
+    The statistics are kept in memory, then written by batches
+    in a separate transaction, so that printing a report is not slowed down.
+    Therefore, the statistics are only a sample: the rows not yet written
+    are lost when a worker is restarted.
+    """
+
+    _name = "aeroo.render.stat"
+    _description = "Aeroo Render Statistics"
+    _order = "date desc, id desc"
+    _rec_name = "report_id"
+
+    date = fields.Datetime(required=True, readonly=True, index=True)
+    report_id = fields.Many2one(
+        "ir.actions.report",
+        "Report",
+        required=True,
+        readonly=True,
+        index=True,
+        ondelete="cascade",
+    )
+    model = fields.Char(readonly=True)
+    user_id = fields.Many2one("res.users", "User", readonly=True, ondelete="set null")
+    record_count = fields.Integer(readonly=True)
+    output_format = fields.Char(readonly=True)
+    output_size = fields.Integer("Output Size (bytes)", readonly=True)
+    cache_hit = fields.Boolean(
+        readonly=True, help="Every document was read from a cache or an attachment."
+    )
+    success = fields.Boolean(readonly=True)
+    query_count = fields.Integer("SQL Queries", readonly=True)
+    duration = fields.Float("Duration (ms)", readonly=True, group_operator="avg")
+    context_duration = fields.Float(
+        "Context Evaluation (ms)", readonly=True, group_operator="avg"
+    )
+    template_duration = fields.Float(
+        "Template Fetch (ms)", readonly=True, group_operator="avg"
+    )
+    generate_duration = fields.Float(
+        "Template Generation (ms)", readonly=True, group_operator="avg"
+    )
+    convert_duration = fields.Float(
+        "Libreoffice Conversion (ms)", readonly=True, group_operator="avg"
+    )
+    merge_duration = fields.Float("Pdf Merge (ms)", readonly=True, group_operator="avg")
+    attachment_duration = fields.Float(
+        "Attachment Write (ms)", readonly=True, group_operator="avg"
+    )
+
+    @api.model
+    def _add_stat(self, values):
+        """Add the statistics of a rendering.
+
+        The statistics are buffered, then written by batches.
+
+        :param dict values: the values of the statistics
+        """
+        rows = render_stat_buffer.add(
+            self.env.cr.dbname,
+            values,
+            int(config.get("aeroo_render_stat_batch_size") or 20),
+            int(config.get("aeroo_render_stat_interval") or 60),
+        )
+        if rows:
+            self._write_stats(rows)
+
+    @api.model
+    def _write_stats(self, rows):
+        """Write the buffered statistics in a separate transaction.
+
+        The statistics are not required for printing a report. Therefore,
+        an error is logged instead of being raised. The rows are not written
+        if a report was modified by a pending transaction, instead of waiting
+        for this transaction.
+
+        :param list rows: the values of the statistics
+        """
+        try:
+            with self.pool.cursor() as cr:
+                cr.execute("SET LOCAL lock_timeout = '1s'")
+                self.with_env(self.env(cr=cr, su=True)).create(rows)
+        except Exception:
+            logger.warning(
+                "Could not write the statistics of %s aeroo renderings.",
+                len(rows),
+                exc_info=True,
+            )
+
+    @api.model
+    def _get_duration_percentiles(self, report_ids):
+        """Get the percentiles of the duration of the successful renderings per report.
+
+        Only the renderings of the days defined by the server option
+        aeroo_render_stat_days are considered.
+
+        :param list report_ids: the ids of the reports
+        :return: a dict mapping the report ids to a tuple (count, p50, p95, p99)
+        """
+        if not report_ids:
+            return {}
+
+        self.flush(["report_id", "date", "success", "duration"])
+        self.env.cr.execute(
+            """
+            SELECT
+                report_id,
+                count(*),
+                percentile_cont(0.5) WITHIN GROUP (ORDER BY duration),
+                percentile_cont(0.95) WITHIN GROUP (ORDER BY duration),
+                percentile_cont(0.99) WITHIN GROUP (ORDER BY duration)
+            FROM aeroo_render_stat
+            WHERE report_id IN %s AND success AND date >= %s
+            GROUP BY report_id
+            """,
+            (tuple(report_ids), self._get_oldest_stat_date()),
+        )
+        return {row[0]: row[1:] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _gc_render_stats(self):
+        """Remove the statistics older than the days defined by aeroo_render_stat_days."""
+        self.search([("date", "<", self._get_oldest_stat_date())]).unlink()
+
+    def _get_oldest_stat_date(self):
+        days = int(config.get("aeroo_render_stat_days") or 90)
+        return fields.Datetime.now() - timedelta(days=days)
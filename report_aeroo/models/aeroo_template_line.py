@@ -5,6 +5,8 @@
 import base64
 from odoo import fields, models
 
+from ..template import get_cached_template_data, invalidate_template_data
+
 
 class AerooTemplateLine(models.Model):
 
@@ -22,4 +24,21 @@ class AerooTemplateLine(models.Model):
     template_filename = fields.Char("File Name")
 
     def get_aeroo_template(self, record):
-        return base64.b64decode(self.template_data)
+        return get_cached_template_data(
+            self._get_aeroo_template_cache_key(),
+            self.write_date,
+            lambda: base64.b64decode(self.template_data),
+        )
+
+    def _get_aeroo_template_cache_key(self):
+        return (self._cr.dbname, self._name, self.id)
+
+    def write(self, vals):
+        for line in self:
+            invalidate_template_data(line._get_aeroo_template_cache_key())
+        return super().write(vals)
+
+    def unlink(self):
+        for line in self:
+            invalidate_template_data(line._get_aeroo_template_cache_key())
+        return super().unlink()
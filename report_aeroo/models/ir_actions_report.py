@@ -4,24 +4,49 @@
 # License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
 
 import base64
+import logging
 import os
-import subprocess
+import tempfile
 import traceback
-from aeroolib.plugins.opendocument import Template, OOSerializer
+from contextlib import contextmanager
 from dateutil.relativedelta import relativedelta
 from functools import wraps
-from io import BytesIO
 from genshi.template.base import Context as GenshiContext
-from tempfile import NamedTemporaryFile
+from io import BytesIO
+from types import MappingProxyType
 
 from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
+from odoo.tools import config, file_open
 from odoo.tools.safe_eval import safe_eval
-from odoo.tools import file_open
-from odoo.addons.mail.models.mail_render_mixin import jinja_template_env
 
 from ..namespace import AerooNamespace
 from ..extra_functions import aeroo_function_registry
+from ..formatting import get_locale_from_lang_and_country_code, preload_locales
+from ..libreoffice import LibreofficeError, get_converter
+from ..parallel import render_in_parallel
+from ..output_cache import AerooOutputCache, get_output_cache_key
+from ..pdf import PdfMergeError, merge_pdf
+from ..render_context import (
+    AerooRenderContext,
+    caching_render_contexts,
+    get_memoized_render_context,
+)
+from ..render_stat import (
+    RENDER_STAGES,
+    is_recording_render_stat,
+    recording_render_stat,
+)
+from ..template import (
+    get_cached_template_data,
+    get_compiled_template,
+    get_filename_template,
+    get_template_hash,
+    invalidate_template_data,
+)
+from ..timing import collect_render_timings, record_cache_hit, render_stage
+
+logger = logging.getLogger(__name__)
 
 
 class IrActionsReport(models.Model):
@@ -108,6 +133,71 @@ class IrActionsReport(models.Model):
         prefetch=False,
         default="user.company_id.currency_id",
     )
+    aeroo_output_cache = fields.Boolean(
+        "Cache Rendered Documents",
+        help="Keep the rendered documents in the filestore. A document is rendered "
+        "again when the template, the record or the report context changes. "
+        "Changes to related records (i.e. lines) are not detected.",
+        prefetch=False,
+    )
+    aeroo_output_cache_ttl = fields.Integer(
+        "Cache Duration (hours)",
+        default=24,
+        prefetch=False,
+    )
+    aeroo_vector_barcodes = fields.Boolean(
+        "Vector Barcodes",
+        help="Generate the barcodes and QR codes of the report as SVG images "
+        "instead of PNG images, so that they are printed sharply at any resolution. "
+        "A template can override this option with the vector parameter.",
+        prefetch=False,
+    )
+    aeroo_cache_control = fields.Char(
+        "HTTP Cache-Control",
+        default="private, no-cache",
+        help="Cache-Control header sent with the downloaded documents. "
+        "With no-cache, the browser asks whether the document changed "
+        "before showing it again, and the document is not rendered again "
+        "if it did not change.",
+        prefetch=False,
+    )
+    aeroo_parallel_workers = fields.Integer(
+        "Parallel Rendering Processes",
+        help="Number of processes used to render the report when printing "
+        "multiple records. If empty, the server option aeroo_parallel_workers "
+        "is used. Only committed data is visible to the processes.",
+        prefetch=False,
+    )
+    aeroo_background_threshold = fields.Integer(
+        "Background Rendering Threshold",
+        help="When printing more records than this number, the report is rendered "
+        "in background by a scheduled action. If empty, the server option "
+        "aeroo_background_threshold is used.",
+        prefetch=False,
+    )
+
+    def _register_hook(self):
+        super()._register_hook()
+        self._preload_aeroo_locales()
+
+    def _preload_aeroo_locales(self):
+        """Load the locales of the installed languages when the registry is loaded.
+
+        The locales of the languages in the countries of the companies are also loaded,
+        because they are used to format currencies.
+        """
+        langs = [code for code, __ in self.env["res.lang"].get_installed()]
+        country_codes = set(
+            self.env["res.company"].sudo().search([]).mapped("country_id.code")
+        )
+        preload_locales(
+            langs
+            + [
+                get_locale_from_lang_and_country_code(lang, country_code)
+                for lang in langs
+                for country_code in country_codes
+            ]
+        )
 
     def report_action(self, docids, data=None, config=True):
         res = super().report_action(docids, data=data, config=config)
@@ -120,7 +210,8 @@ class IrActionsReport(models.Model):
 
         return super().read(fields, load)
 
-    def _get_aeroo_template(self, record):
+    @render_stage("template")
+    def _get_aeroo_template(self, record, render_context=None):
         """Get an aeroo template for the given record.
 
         There are 3 ways to store the aeroo template:
@@ -130,6 +221,7 @@ class IrActionsReport(models.Model):
         3- one template per combination (lang, company) stored in the database
 
         :param record: the record for which to generate the report
+        :param render_context: the evaluated render context of the record, if known
         :return: the template's binary file
         """
         if self.aeroo_template_source == "file":
@@ -138,37 +230,69 @@ class IrActionsReport(models.Model):
         if self.aeroo_template_source == "database":
             return self._get_aeroo_template_from_database()
 
-        return self._get_aeroo_template_from_lines(record)
+        return self._get_aeroo_template_from_lines(record, render_context)
 
     def _get_aeroo_template_from_file(self):
-        """Get an aeroo template from a file."""
-        with file_open(self.aeroo_template_path, "rb") as file:
-            return file.read()
+        """Get an aeroo template from a file.
+
+        The content of the file is cached until its modification time changes.
+        """
+        path = self.aeroo_template_path
+        with file_open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            return get_cached_template_data(
+                ("file", path),
+                (stat.st_mtime_ns, stat.st_size),
+                lambda: file.read(),
+            )
 
     def _get_aeroo_template_from_database(self):
-        """Get an aeroo template stored in the database."""
-        return base64.b64decode(self.aeroo_template_data)
+        """Get an aeroo template stored in the database.
+
+        The decoded template is cached until the report is modified.
+        """
+        return get_cached_template_data(
+            self._get_aeroo_template_cache_key(),
+            self.write_date,
+            lambda: base64.b64decode(self.aeroo_template_data),
+        )
+
+    def _get_aeroo_template_cache_key(self):
+        return (self._cr.dbname, self._name, self.id)
+
+    def write(self, vals):
+        for report in self:
+            invalidate_template_data(report._get_aeroo_template_cache_key())
+        return super().write(vals)
+
+    def unlink(self):
+        for report in self:
+            invalidate_template_data(report._get_aeroo_template_cache_key())
+        return super().unlink()
 
-    def _get_aeroo_template_from_lines(self, record):
+    def _get_aeroo_template_from_lines(self, record, render_context=None):
         """Get an aeroo template from the template lines.
 
         :param record: the record for which to generate the report
+        :param render_context: the evaluated render context of the record, if known
         :return: the template's binary file
         """
-        template_line = self._get_aeroo_template_line(record)
+        template_line = self._get_aeroo_template_line(record, render_context)
         return template_line.get_aeroo_template(record)
 
-    def _get_aeroo_template_line(self, record):
+    def _get_aeroo_template_line(self, record, render_context=None):
         """Get an aeroo template line matching the given record.
 
         An aeroo report can have different templates per company
         and per language.
 
         :param record: the record for which to generate the report
+        :param render_context: the evaluated render context of the record, if known
         :return: the template's binary file
         """
-        lang = self._get_aeroo_lang(record)
-        company = self._get_aeroo_company(record)
+        render_context = render_context or self._get_aeroo_render_context(record)
+        lang = render_context.lang
+        company = render_context.company
 
         def line_matches_lang(line):
             return not line.lang_id or line.lang_id.code == lang
@@ -202,30 +326,72 @@ class IrActionsReport(models.Model):
     def _get_aeroo_variable_eval_context(self, record):
         return {"o": record, "user": self.env.user}
 
+    def _get_aeroo_render_context(self, record):
+        """Evaluate the context expressions of the report for a given record.
+
+        The expressions are evaluated together with a single evaluation context.
+        Inside a caching_render_contexts block (i.e. while rendering the report),
+        the context of a record is evaluated once.
+
+        :rtype: AerooRenderContext
+        """
+        return get_memoized_render_context(
+            (self.env.cr, self.id, record._name, record.id),
+            lambda: self._evaluate_aeroo_render_context(record),
+        )
+
+    @render_stage("context")
+    def _evaluate_aeroo_render_context(self, record):
+        eval_context = self._get_aeroo_variable_eval_context(record)
+
+        def evaluate(expression, default=None):
+            return self._eval_aeroo_expression(expression, eval_context, default)
+
+        return AerooRenderContext(
+            lang=evaluate(self.aeroo_lang_eval) or "en_US",
+            tz=evaluate(self.aeroo_tz_eval),
+            company=evaluate(self.aeroo_company_eval, self.env.user.company_id),
+            country=evaluate(self.aeroo_country_eval),
+            currency=evaluate(self.aeroo_currency_eval),
+        )
+
+    def _eval_aeroo_expression(self, expression, eval_context, default=None):
+        """Evaluate a context expression of the report.
+
+        :param str expression: the expression or an empty value
+        :param dict eval_context: the variables available in the expression
+        :param default: the value returned if the expression is empty
+        """
+        if not expression:
+            return default
+        return safe_eval(expression, eval_context)
+
+    def _get_aeroo_render_contexts(self, records):
+        """Evaluate the context expressions of the report for a whole recordset.
+
+        The records are iterated from the given recordset. Therefore, the fields
+        read by the expressions (i.e. o.partner_id.lang) are fetched for all
+        records at once by the prefetching of the ORM, instead of once per record.
+
+        :param records: the records for which to generate the report
+        :return: a dict mapping each record id to its AerooRenderContext
+        """
+        return {record.id: self._get_aeroo_render_context(record) for record in records}
+
     def _get_aeroo_lang(self, record):
         """Get the lang to use in the report for a given record.
 
-        :rtype: res.company
+        :rtype: str
         """
-        lang = (
-            safe_eval(
-                self.aeroo_lang_eval, self._get_aeroo_variable_eval_context(record)
-            )
-            if self.aeroo_lang_eval
-            else None
-        )
+        lang = self._eval_aeroo_single_expression(self.aeroo_lang_eval, record)
         return lang or "en_US"
 
     def _get_aeroo_timezone(self, record):
         """Get the timezone to use in the report for a given record.
 
-        :rtype: res.company
+        :rtype: str
         """
-        return (
-            safe_eval(self.aeroo_tz_eval, self._get_aeroo_variable_eval_context(record))
-            if self.aeroo_tz_eval
-            else None
-        )
+        return self._eval_aeroo_single_expression(self.aeroo_tz_eval, record)
 
     def _get_aeroo_company(self, record):
         """Get the company to use in the report for a given record.
@@ -235,12 +401,8 @@ class IrActionsReport(models.Model):
 
         :rtype: res.company
         """
-        return (
-            safe_eval(
-                self.aeroo_company_eval, self._get_aeroo_variable_eval_context(record)
-            )
-            if self.aeroo_company_eval
-            else self.env.user.company_id
+        return self._eval_aeroo_single_expression(
+            self.aeroo_company_eval, record, self.env.user.company_id
         )
 
     def _get_aeroo_country(self, record):
@@ -251,13 +413,7 @@ class IrActionsReport(models.Model):
 
         :rtype: res.country
         """
-        return (
-            safe_eval(
-                self.aeroo_country_eval, self._get_aeroo_variable_eval_context(record)
-            )
-            if self.aeroo_country_eval
-            else None
-        )
+        return self._eval_aeroo_single_expression(self.aeroo_country_eval, record)
 
     def _get_aeroo_currency(self, record):
         """Get the currency to use in the report for a given record.
@@ -267,21 +423,26 @@ class IrActionsReport(models.Model):
 
         :rtype: res.currency
         """
-        return (
-            safe_eval(
-                self.aeroo_currency_eval, self._get_aeroo_variable_eval_context(record)
-            )
-            if self.aeroo_currency_eval
-            else None
+        return self._eval_aeroo_single_expression(self.aeroo_currency_eval, record)
+
+    def _eval_aeroo_single_expression(self, expression, record, default=None):
+        """Evaluate one context expression of the report for a given record."""
+        return self._eval_aeroo_expression(
+            expression, self._get_aeroo_variable_eval_context(record), default
         )
 
-    def _get_aeroo_context(self, record):
-        """Get the rendering context of an aeroo report."""
+    def _get_aeroo_context(self, record, render_context=None):
+        """Get the rendering context of an aeroo report.
+
+        :param record: the record for which to generate the report
+        :param render_context: the evaluated render context of the record, if known
+        """
+        render_context = render_context or self._get_aeroo_render_context(record)
         return {
-            "lang": self._get_aeroo_lang(record),
-            "tz": self._get_aeroo_timezone(record),
-            "country": self._get_aeroo_country(record),
-            "currency": self._get_aeroo_currency(record),
+            "lang": render_context.lang,
+            "tz": render_context.tz,
+            "country": render_context.country,
+            "currency": render_context.currency,
             "relativedelta": relativedelta,
         }
 
@@ -289,6 +450,7 @@ class IrActionsReport(models.Model):
         """Get the timeout of the Libreoffice process in seconds."""
         return 60
 
+    @caching_render_contexts()
     def _render_aeroo(self, doc_ids, data=None, force_output_format=None):
         """Render an aeroo report.
 
@@ -310,32 +472,289 @@ class IrActionsReport(models.Model):
             return self._render_aeroo_multi(doc_ids, data, output_format)
 
         record = self.env[self.model].browse(doc_ids[0])
-        report_context = self._get_aeroo_context(record)
-        self = self.with_context(**report_context)
+        with self._render_aeroo_record_file(record, data, output_format) as output:
+            return output.read(), output_format
 
-        # Check if an attachment already exists
-        attachment_output = self._find_aeroo_report_attachment(record, output_format)
-        if attachment_output:
-            return attachment_output, output_format
+    def _render_aeroo_record_file(self, record, data, output_format):
+        """Render an aeroo report for a single record into a binary file object.
+
+        A document stored as an attachment or in the output cache
+        is opened from the filestore instead of being loaded in memory.
 
-        template = self._get_aeroo_template(record)
+        :param record: the record for which to generate the report
+        :param dict data: the data to send to the report as context.
+        :param str output_format: the output format of the report.
+        :return: a binary file object
+        """
+        render_context = self._get_aeroo_render_context(record)
+        self = self.with_context(**self._get_aeroo_context(record, render_context))
+
+        filename = (
+            self.get_aeroo_filename(record, output_format, render_context)
+            if self.attachment_use
+            else None
+        )
+
+        # Check if an attachment already exists
+        attachment = self._search_aeroo_report_attachments(
+            record, output_format, {record.id: filename} if filename else None
+        ).get(record.id)
+        if attachment:
+            record_cache_hit()
+            return self._open_aeroo_attachment(attachment)
 
         # Render the report
+        cache_key = self._get_aeroo_output_cache_key(
+            record, data, output_format, render_context
+        )
+        output = None
+        cached_path = self._get_aeroo_cached_output_path(cache_key)
+        if cached_path:
+            record_cache_hit()
+            if not self.attachment_use:
+                try:
+                    return open(cached_path, "rb")
+                except OSError:
+                    pass
+            output = self._get_aeroo_cached_output(cache_key)
+
+        if output is None:
+            output = self._render_aeroo_document(
+                record, data, output_format, render_context
+            )
+            self._set_aeroo_cached_output(cache_key, output)
+
+        # Generate the attachment
+        if self.attachment_use:
+            self._create_aeroo_attachment(record, output, output_format, filename)
+
+        return BytesIO(output)
+
+    @caching_render_contexts()
+    def _render_aeroo_file(self, doc_ids, data=None, force_output_format=None):
+        """Render an aeroo report into a binary file object.
+
+        The pdf merged from multiple records is written into a spooled temporary file,
+        so that a large document is not held in memory.
+
+        The document of a single record is rendered with `_render_aeroo`,
+        so that modules extending `_render_aeroo` apply to downloaded documents.
+
+        The caller is responsible for closing the file.
+
+        :param list doc_ids: the ids of the records.
+        :param dict data: the data to send to the report as context.
+        :param str force_output_format: whether to force a given output report format.
+        :return: a tuple (binary file object, output format)
+        """
+        if self.multi or len(doc_ids) <= 1:
+            content, output_format = self._render_aeroo(
+                doc_ids, data, force_output_format
+            )
+            return BytesIO(content), output_format
+
+        output_format = force_output_format or self.aeroo_out_format_id.code
+        output = tempfile.SpooledTemporaryFile(
+            max_size=self._get_aeroo_spool_max_size()
+        )
+        try:
+            self._render_aeroo_multi(doc_ids, data or {}, output_format, output)
+        except Exception:
+            output.close()
+            raise
+        output.seek(0)
+        return output, output_format
+
+    def _open_aeroo_attachment(self, attachment):
+        """Open the content of an attachment, directly from the filestore if possible.
+
+        :param attachment: the ir.attachment record
+        :return: a binary file object
+        """
+        if attachment.store_fname:
+            try:
+                return open(attachment._full_path(attachment.store_fname), "rb")
+            except OSError:
+                pass
+        return BytesIO(attachment.raw)
+
+    def _get_aeroo_spool_max_size(self):
+        """Get the size in bytes above which a rendered document is written to disk."""
+        return int(config.get("aeroo_spool_max_size") or 16) * 1024 * 1024
+
+    def _render_aeroo_document(self, record, data, output_format, render_context):
+        """Render the aeroo template for a single record.
+
+        :param record: the record for which to generate the report
+        :param dict data: the data to send to the report as context.
+        :param str output_format: the output format of the report.
+        :param AerooRenderContext render_context: the render context of the record.
+        :return: the report's binary data
+        """
+        template = self._get_aeroo_template(record, render_context)
+        report_context = self._get_aeroo_context(record, render_context)
+
         current_report_data = dict(
             data,
             o=record.with_context(**report_context),
-            company=self._get_aeroo_company(record),
+            company=render_context.company,
             **report_context
         )
-        output = self._render_aeroo_content(
+        return self._render_aeroo_content(
             template, current_report_data, output_format
         )
 
-        # Generate the attachment
-        if self.attachment_use:
-            self._create_aeroo_attachment(record, output, output_format)
+    def _get_aeroo_output_cache_key(self, record, data, output_format, render_context):
+        """Get the key identifying a rendered document in the output cache.
 
-        return output, output_format
+        :return: the cache key or None if the document must not be cached
+        """
+        if not self.aeroo_output_cache:
+            return None
+
+        return self._get_aeroo_document_key(
+            record, data, output_format, render_context
+        )
+
+    def _get_aeroo_document_key(self, record, data, output_format, render_context):
+        """Get a key identifying the content of the document rendered for a record.
+
+        Records modified in the current transaction have no key, because
+        their write_date does not change until the end of the transaction.
+
+        :return: the key or None if the content can not be identified
+        """
+        if "write_date" not in record._fields:
+            return None
+
+        if record.write_date == self.env.cr.now():
+            return None
+
+        template = self._get_aeroo_template(record, render_context)
+        try:
+            return get_output_cache_key(
+                [
+                    get_template_hash(template),
+                    record._name,
+                    record.id,
+                    fields.Datetime.to_string(record.write_date),
+                    output_format,
+                    *self._get_aeroo_render_context_key(render_context),
+                    *self._get_aeroo_access_key(),
+                    *self._get_aeroo_rendering_options(),
+                    data,
+                ]
+            )
+        except TypeError:
+            logger.debug(
+                "The data of the report %s can not be serialized. "
+                "The document rendered for %s is not cached.",
+                self.report_name,
+                record,
+            )
+            return None
+
+    def _get_aeroo_render_context_key(self, render_context):
+        """Get the values of a render context that are part of a document key.
+
+        Records are replaced by their model and ids, so that the key
+        does not depend on their representation.
+
+        :param AerooRenderContext render_context: the render context of the record.
+        :return: a list of values
+        """
+        return [
+            [value._name, value.ids] if isinstance(value, models.BaseModel) else value
+            for value in render_context
+        ]
+
+    def _get_aeroo_access_key(self):
+        """Get the values identifying the access rights of a document key.
+
+        The same record rendered by two users may have a different content,
+        because the records readable by each user are not the same.
+        Therefore, a document is only served to the user who rendered it,
+        within the same company and superuser mode.
+
+        :return: a list of values
+        """
+        return [self.env.uid, self.env.company.id, self.env.su]
+
+    def _get_aeroo_rendering_options(self):
+        """Get the options of the report that change the content of its documents.
+
+        These options are part of the key of a rendered document, so that
+        documents rendered before changing an option are not served anymore.
+
+        :return: a list of values
+        """
+        return [self.aeroo_vector_barcodes, config.get("aeroo_image_dpi")]
+
+    def _get_aeroo_etag(self, doc_ids, output_format, data=None):
+        """Get the entity tag of the document rendered for the given records.
+
+        The tag changes with the template, the record and its render context,
+        so that a browser can reuse a downloaded document without rendering it again.
+
+        Only a document rendered for a single record has a tag. A document merged
+        from multiple records is rarely downloaded twice, so that computing its tag
+        for every record would slow down each download. Reports generated from
+        a list of records have no tag, because their content depends on records
+        not known in advance.
+
+        :param list doc_ids: the ids of the records.
+        :param str output_format: the output format of the report.
+        :param dict data: the data to send to the report as context.
+        :return: the tag or None if the content can not be identified
+        """
+        if self.multi or len(doc_ids) != 1:
+            return None
+
+        record = self.env[self.model].browse(doc_ids[0])
+        key = self._get_aeroo_document_key(
+            record, data or {}, output_format, self._get_aeroo_render_context(record)
+        )
+        return get_output_cache_key([self.id, output_format, key]) if key else None
+
+    def _get_aeroo_output_cache(self):
+        directory = os.path.join(config.filestore(self._cr.dbname), "aeroo_cache")
+        return AerooOutputCache(directory)
+
+    def _get_aeroo_cached_output(self, cache_key):
+        """Get a rendered document from the output cache.
+
+        :param cache_key: the key of the document or None
+        :return: the document or None if not found
+        """
+        if cache_key is None:
+            return None
+        return self._get_aeroo_output_cache().get(cache_key)
+
+    def _get_aeroo_cached_output_path(self, cache_key):
+        """Get the path of a rendered document in the output cache.
+
+        :param cache_key: the key of the document or None
+        :return: the path of the document or None if not found
+        """
+        if cache_key is None:
+            return None
+        return self._get_aeroo_output_cache().get_path(cache_key)
+
+    def _set_aeroo_cached_output(self, cache_key, output):
+        """Store a rendered document in the output cache.
+
+        :param cache_key: the key of the document or None
+        :param output: the rendered document
+        """
+        if cache_key is not None:
+            ttl = self.aeroo_output_cache_ttl * 3600
+            self._get_aeroo_output_cache().set(cache_key, output, ttl)
+
+    @api.model
+    def _gc_aeroo_output_cache(self):
+        """Remove expired and least recently used documents from the output cache."""
+        max_size = int(config.get("aeroo_output_cache_size") or 1024) * 1024 * 1024
+        self._get_aeroo_output_cache().clean(max_size)
 
     def _render_aeroo_content(self, template, data, output_format):
         """Generate the aeroo report binary from the template.
@@ -345,27 +764,41 @@ class IrActionsReport(models.Model):
         :param output_format: the output format
         :return: the report's binary data
         """
-        # The first given record is
-        template_io = BytesIO()
-        template_io.write(template)
-        serializer = OOSerializer(template_io)
-
         report_context = GenshiContext(**data)
-        report_context.update(self._get_aeroo_extra_functions())
         report_context["t"] = AerooNamespace()
+        report_context.frames.append(self._get_aeroo_base_context())
 
-        output = (
-            Template(source=template_io, serializer=serializer)
-            .generate(report_context)
-            .render()
-            .getvalue()
-        )
+        with render_stage("generate"):
+            output = get_compiled_template(template).render(report_context)
 
         if self.aeroo_in_format != output_format:
             output = self._convert_aeroo_report(output, output_format)
 
         return output
 
+    def _get_aeroo_base_context(self):
+        """Get the variables shared by every document rendered with the report.
+
+        The extra functions are wrapped once per report and environment,
+        instead of once per rendered document. The mapping is layered under
+        the data of each document, so it is never copied. It is read-only,
+        because it is shared between documents.
+
+        :rtype: types.MappingProxyType
+        """
+        # The cache is stored on the environment, so that it is released
+        # with the environment and never shared between contexts.
+        base_contexts = vars(self.env).setdefault("_aeroo_base_contexts", {})
+        base_context = base_contexts.get(self.id)
+
+        if base_context is None:
+            base_context = MappingProxyType(
+                dict(self._get_aeroo_extra_functions(), relativedelta=relativedelta)
+            )
+            base_contexts[self.id] = base_context
+
+        return base_context
+
     def _get_aeroo_extra_functions(self):
         """Get a dictionnary of extra functions available inside an aeroo template."""
         return {
@@ -385,10 +818,11 @@ class IrActionsReport(models.Model):
 
         return wrapper
 
-    def get_aeroo_filename(self, record, output_format):
+    def get_aeroo_filename(self, record, output_format, render_context=None):
         """Get the attachement filename for the generated report.
 
         :param record: the record for which to generate the report
+        :param render_context: the evaluated render context of the record, if known
         :return: the filename
         """
         if self.attachment:
@@ -397,6 +831,32 @@ class IrActionsReport(models.Model):
         else:
             return ".".join((self.name, output_format))
 
+    def get_aeroo_filenames(self, records, output_format, render_contexts=None):
+        """Get the attachment filenames of the report for a whole recordset.
+
+        Each filename is rendered in the context (i.e. the language)
+        of its record.
+
+        :param records: the records for which to generate the report
+        :param str output_format: the output format of the report
+        :param render_contexts: the render contexts of the records per id, if known
+        :return: a dict mapping each record id to its filename
+        """
+        if render_contexts is None:
+            render_contexts = self._get_aeroo_render_contexts(records)
+
+        filenames = {}
+        for record in records:
+            render_context = render_contexts[record.id]
+            report = self.with_context(
+                **self._get_aeroo_context(record, render_context)
+            )
+            filenames[record.id] = report.get_aeroo_filename(
+                record, output_format, render_context
+            )
+
+        return filenames
+
     def _eval_aeroo_attachment_filename(self, filename, record):
         """Evaluate the given attachment filename for the given record.
 
@@ -404,12 +864,10 @@ class IrActionsReport(models.Model):
         :param record: the record for which to evaluate the filename
         :return: the rendered attachment filename
         """
-        template = jinja_template_env.from_string(tools.ustr(filename))
-        context = {"o": record.with_context()}
-        context.update(self._get_aeroo_extra_functions())
-        return template.render(context)
+        template = get_filename_template(tools.ustr(filename))
+        return template.render(self._get_aeroo_base_context(), o=record.with_context())
 
-    def _find_aeroo_report_attachment(self, record, output_format):
+    def _find_aeroo_report_attachment(self, record, output_format, filename=None):
         """Find an attachment of the Aeroo report on the given record.
 
         If the report is stored as an attachment, it will be generated
@@ -419,30 +877,79 @@ class IrActionsReport(models.Model):
         the binary data stored in the attachment. Otherwise, it returns None.
 
         :param record: the record for which to find the attachement
+        :param filename: the filename of the attachment if already rendered
         :return: the report's binary data or None
         """
-        if self.attachment_use:
-            filename = self.get_aeroo_filename(record, output_format)
-            attachment = self.env["ir.attachment"].search(
-                [
-                    ("res_id", "=", record.id),
-                    ("res_model", "=", record._name),
-                    ("name", "=", filename),
-                ],
-                limit=1,
-            )
-            if attachment:
-                return base64.decodestring(attachment.datas)
-        return None
+        filenames = {record.id: filename} if filename else None
+        return self._find_aeroo_report_attachments(
+            record, output_format, filenames
+        ).get(record.id)
+
+    def _find_aeroo_report_attachments(self, records, output_format, filenames=None):
+        """Find the attachments of the Aeroo report on the given records.
+
+        The attachments of all records are fetched with a single query.
+
+        :param records: the records for which to find the attachements
+        :param output_format: the output format of the report
+        :param filenames: an optional dict of attachment filenames per record id.
+            If not given, the filenames are rendered for each record.
+        :return: a dict mapping the ids of the records with an attachment
+            to the report's binary data
+        """
+        attachments = self._search_aeroo_report_attachments(
+            records, output_format, filenames
+        )
+        return {
+            res_id: base64.b64decode(attachment.datas)
+            for res_id, attachment in attachments.items()
+        }
+
+    def _search_aeroo_report_attachments(self, records, output_format, filenames=None):
+        """Search the attachments of the Aeroo report on the given records.
 
-    def _create_aeroo_attachment(self, record, file_data, output_format):
+        :param records: the records for which to find the attachements
+        :param output_format: the output format of the report
+        :param filenames: an optional dict of attachment filenames per record id.
+            If not given, the filenames are rendered for each record.
+        :return: a dict mapping the ids of the records with an attachment
+            to their ir.attachment record
+        """
+        if not self.attachment_use or not records:
+            return {}
+
+        if filenames is None:
+            filenames = self.get_aeroo_filenames(records, output_format)
+
+        attachments = self.env["ir.attachment"].search(
+            [
+                ("res_id", "in", records.ids),
+                ("res_model", "=", records._name),
+                ("name", "in", list(set(filenames.values()))),
+            ]
+        )
+
+        result = {}
+        for attachment in attachments:
+            if (
+                attachment.res_id not in result
+                and filenames.get(attachment.res_id) == attachment.name
+            ):
+                result[attachment.res_id] = attachment
+
+        return result
+
+    @render_stage("attachment")
+    def _create_aeroo_attachment(self, record, file_data, output_format, filename=None):
         """Save the generated aeroo report as attachment.
 
         :param record: the record used to generate the report
         :param file_data: the generated report's binary file
+        :param filename: the filename of the attachment if already rendered
         :return: the generated attachment
         """
-        filename = self.get_aeroo_filename(record, output_format)
+        if filename is None:
+            filename = self.get_aeroo_filename(record, output_format)
         return self.env["ir.attachment"].create(
             {
                 "name": filename,
@@ -452,6 +959,7 @@ class IrActionsReport(models.Model):
             }
         )
 
+    @render_stage("convert")
     def _convert_aeroo_report(self, output, output_format):
         """Convert a generated aeroo report to the output format.
 
@@ -459,27 +967,14 @@ class IrActionsReport(models.Model):
         :return: the content of the generated report
         :rtype: bytes
         """
-        in_format = self.aeroo_in_format
-
-        temp_file = generate_temporary_file(in_format, output)
-        filedir, filename = os.path.split(temp_file.name)
-
-        cmd = [
-            "libreoffice",
-            "--headless",
-            "--convert-to",
-            output_format,
-            "--outdir",
-            filedir,
-            temp_file.name,
-        ]
-
+        converter = self._get_aeroo_converter()
         timeout = self._get_aeroo_libreoffice_timeout()
 
         try:
-            subprocess.call(cmd, timeout=timeout)
-        except Exception as exc:
-            os.remove(temp_file.name)
+            return converter.convert(
+                output, self.aeroo_in_format, output_format, timeout
+            )
+        except LibreofficeError as exc:
             raise ValidationError(
                 _(
                     "Could not generate the report %(report)s "
@@ -493,24 +988,74 @@ class IrActionsReport(models.Model):
                 }
             )
 
-        output_file = temp_file.name[:-3] + output_format
-        with open(output_file, "rb") as f:
-            output = f.read()
+    @render_stage("convert")
+    def _convert_aeroo_reports(self, outputs, output_format, records):
+        """Convert multiple generated aeroo reports to the output format.
 
-        os.remove(temp_file.name)
-        os.remove(output_file)
+        The reports are converted by chunks, each chunk in a single
+        call to the conversion backend.
 
-        return output
+        :param list outputs: the aeroo data to convert.
+        :param str output_format: the output format.
+        :param records: the records for which the reports were generated,
+            in the same order as the outputs.
+        :return: the converted reports in the same order as the outputs
+        :rtype: list
+        """
+        converter = self._get_aeroo_converter()
+        timeout = self._get_aeroo_libreoffice_timeout()
+        batch_size = self._get_aeroo_conversion_batch_size()
+        result = []
+
+        for start in range(0, len(outputs), batch_size):
+            chunk = outputs[start : start + batch_size]
+            try:
+                result.extend(
+                    converter.convert_many(
+                        chunk, self.aeroo_in_format, output_format, timeout
+                    )
+                )
+            except LibreofficeError as exc:
+                record = records[start + exc.index] if exc.index is not None else None
+                raise ValidationError(
+                    _(
+                        "Could not generate the report %(report)s "
+                        "for the record %(record)s "
+                        "using the format %(output_format)s. "
+                        "%(error)s"
+                    )
+                    % {
+                        "report": self.name,
+                        "record": record.display_name if record else "",
+                        "output_format": output_format,
+                        "error": exc,
+                    }
+                )
+
+        return result
+
+    def _get_aeroo_conversion_batch_size(self):
+        """Get the maximum number of documents converted by a single Libreoffice call."""
+        return int(config.get("aeroo_libreoffice_batch_size") or 50)
+
+    def _get_aeroo_converter(self):
+        """Get the backend used for converting reports with Libreoffice.
+
+        The backend is selected in the configuration file of the server.
+        """
+        return get_converter(config)
 
-    def _render_aeroo_multi(self, doc_ids, data, output_format):
+    def _render_aeroo_multi(self, doc_ids, data, output_format, output=None):
         """Render an aeroo report for multiple records at the same time.
 
-        All reports are generated individually and merged together using pdftk.
+        All reports are generated individually and merged together.
         Only reports in pdf formats are supported.
 
         :param list doc_ids: the ids of the records.
         :param dict data: the data to send to the report as context.
+        :param output: an optional binary file object where to write the merged pdf.
         :return: the content of the merged pdf reports
+            or None if the pdf was written into the given output
         :rtype: bytes
         """
         if output_format != "pdf":
@@ -521,16 +1066,11 @@ class IrActionsReport(models.Model):
                 )
             )
 
-        input_files = []
-
-        for record_id in doc_ids:
-            report = self._render_aeroo([record_id], data)
-            temp_file = generate_temporary_file(output_format, report[0])
-            input_files.append(temp_file.name)
+        outputs = self._render_aeroo_records(doc_ids, data, output_format)
 
         try:
-            return self._merge_aeroo_pdf(input_files), "pdf"
-        except Exception as exc:
+            return self._merge_aeroo_pdf(outputs, output), "pdf"
+        except PdfMergeError as exc:
             traceback.print_exc()
             raise ValidationError(
                 _(
@@ -542,45 +1082,198 @@ class IrActionsReport(models.Model):
                     "error": exc,
                 }
             )
-        finally:
-            for file in input_files:
-                os.remove(file)
 
-    def _merge_aeroo_pdf(self, input_files):
-        """Merge the given pdf files together using pdftk.
+    def _render_aeroo_records(self, doc_ids, data, output_format):
+        """Render an aeroo report individually for each given record.
 
-        :param list input_files: the paths to the pdf files to merge.
-        :return: the content of the merged pdf reports
-        :rtype: bytes
+        If parallel rendering is enabled, the records are dispatched
+        to a pool of processes.
+
+        :param list doc_ids: the ids of the records.
+        :param dict data: the data to send to the report as context.
+        :param str output_format: the output format of the report.
+        :return: an iterator over the rendered reports in the same order as doc_ids
         """
-        output_file = generate_temporary_file("pdf")
+        workers = min(self._get_aeroo_parallel_workers(), len(doc_ids))
 
-        cmd = ["pdfunite", *input_files, output_file.name]
-        timeout = self._get_aeroo_libreoffice_timeout()
+        if workers > 1:
+            return render_in_parallel(self, doc_ids, data, output_format, workers)
 
-        try:
-            subprocess.call(cmd, timeout=timeout)
-        except BaseException:
-            os.remove(output_file.name)
-            raise
+        return self._render_aeroo_batch(doc_ids, data, output_format)
 
-        with open(output_file.name, "rb") as f:
-            output = f.read()
+    def _render_aeroo_batch(self, doc_ids, data, output_format):
+        """Render an aeroo report for multiple records in a single process.
 
-        os.remove(output_file.name)
+        The templates of a chunk of records are rendered first.
+        Then, the chunk is converted to the output format at once,
+        so that Libreoffice is started once per chunk instead of once per record.
 
-        return output
+        :param list doc_ids: the ids of the records.
+        :param dict data: the data to send to the report as context.
+        :param str output_format: the output format of the report.
+        :return: an iterator over the rendered reports in the same order as doc_ids
+        """
+        batch_size = self._get_aeroo_conversion_batch_size()
+        records = self.env[self.model].browse(doc_ids)
+        render_contexts = self._get_aeroo_render_contexts(records)
+
+        for start in range(0, len(doc_ids), batch_size):
+            chunk_ids = doc_ids[start : start + batch_size]
+            yield from self._render_aeroo_chunk(
+                chunk_ids, data, output_format, render_contexts
+            )
+
+    def _render_aeroo_chunk(self, doc_ids, data, output_format, render_contexts=None):
+        """Render and convert an aeroo report for a chunk of records.
+
+        :param render_contexts: the render contexts of the records per id, if known
+        :return: the rendered reports in the same order as doc_ids
+        :rtype: list
+        """
+        records = self.env[self.model].browse(doc_ids)
+        outputs = [None] * len(records)
+        to_convert = []
+
+        if render_contexts is None:
+            render_contexts = self._get_aeroo_render_contexts(records)
+
+        filenames = {}
+        if self.attachment_use:
+            filenames = self.get_aeroo_filenames(
+                records, output_format, render_contexts
+            )
+
+        render_contexts = [render_contexts[record.id] for record in records]
+        reports = [
+            self.with_context(**self._get_aeroo_context(record, render_context))
+            for record, render_context in zip(records, render_contexts)
+        ]
+
+        attachment_outputs = self._find_aeroo_report_attachments(
+            records, output_format, filenames
+        )
+
+        for index, record in enumerate(records):
+            if record.id in attachment_outputs:
+                record_cache_hit()
+                outputs[index] = attachment_outputs[record.id]
+                continue
+
+            report = reports[index]
+            cache_key = report._get_aeroo_output_cache_key(
+                record, data, output_format, render_contexts[index]
+            )
+            cached_output = self._get_aeroo_cached_output(cache_key)
+            if cached_output is not None:
+                record_cache_hit()
+                outputs[index] = cached_output
+                if self.attachment_use:
+                    report._create_aeroo_attachment(
+                        record, cached_output, output_format, filenames[record.id]
+                    )
+                continue
+
+            output = report._render_aeroo_document(
+                record, data, self.aeroo_in_format, render_contexts[index]
+            )
+            to_convert.append((index, record, report, output, cache_key))
+
+        if self.aeroo_in_format != output_format:
+            converted = self._convert_aeroo_reports(
+                [output for __, __, __, output, __ in to_convert],
+                output_format,
+                [record for __, record, __, __, __ in to_convert],
+            )
+        else:
+            converted = [output for __, __, __, output, __ in to_convert]
+
+        for (index, record, report, __, cache_key), output in zip(
+            to_convert, converted
+        ):
+            self._set_aeroo_cached_output(cache_key, output)
+            if self.attachment_use:
+                report._create_aeroo_attachment(
+                    record, output, output_format, filenames[record.id]
+                )
+            outputs[index] = output
+
+        return outputs
+
+    def _get_aeroo_parallel_workers(self):
+        """Get the number of processes used to render the report for multiple records.
+
+        The value defined on the report has priority over the server option
+        aeroo_parallel_workers.
+        """
+        return self.aeroo_parallel_workers or int(
+            config.get("aeroo_parallel_workers") or 1
+        )
+
+    def _get_aeroo_background_threshold(self):
+        """Get the number of records above which the report is rendered in background.
+
+        The value defined on the report has priority over the server option
+        aeroo_background_threshold. A value of 0 disables background rendering.
+        """
+        return self.aeroo_background_threshold or int(
+            config.get("aeroo_background_threshold") or 0
+        )
+
+    def _should_render_aeroo_in_background(self, doc_ids, output_format=None):
+        """Evaluate whether the report should be rendered in background.
+
+        Only reports merging one pdf document per record can be rendered
+        by chunks in background.
+
+        :param list doc_ids: the ids of the records.
+        :param str output_format: the output format of the report.
+        """
+        output_format = output_format or self.aeroo_out_format_id.code
+        threshold = self._get_aeroo_background_threshold()
+        return (
+            not self.multi
+            and output_format == "pdf"
+            and bool(threshold)
+            and len(doc_ids) > threshold
+        )
+
+    def _render_aeroo_in_background(self, doc_ids, data=None):
+        """Render the report in background.
+
+        :param list doc_ids: the ids of the records.
+        :param dict data: the data to send to the report as context.
+        :return: the job rendering the report
+        """
+        return self.env["aeroo.render.job"].create_job(self, doc_ids, data)
+
+    @render_stage("merge")
+    def _merge_aeroo_pdf(self, pdfs, output=None):
+        """Merge the given pdf documents together.
+
+        :param pdfs: an iterable of pdf documents (bytes or binary file objects).
+        :param output: an optional binary file object where to write the merged pdf.
+        :return: the content of the merged pdf reports
+            or None if the pdf was written into the given output
+        :rtype: bytes
+        """
+        if output is not None:
+            merge_pdf(pdfs, output)
+            return None
+
+        output = BytesIO()
+        merge_pdf(pdfs, output)
+        return output.getvalue()
 
 
 class IrActionsReportWithSudo(models.Model):
 
     _inherit = "ir.actions.report"
 
-    def _get_aeroo_template(self, record):
+    def _get_aeroo_template(self, record, render_context=None):
         """Prevent access rights from impacting the aeroo template selection."""
         self = self.sudo()
         record = record.sudo()
-        return super()._get_aeroo_template(record)
+        return super()._get_aeroo_template(record, render_context)
 
 
 class AerooReportsGeneratedFromListViews(models.Model):
@@ -627,12 +1320,13 @@ class AerooReportsGeneratedFromListViews(models.Model):
 
         records = self.env[self.model].browse(doc_ids)
 
-        template = self._get_aeroo_template(records[0])
-        report_context = self._get_aeroo_context(records[0])
+        render_context = self._get_aeroo_render_context(records[0])
+        template = self._get_aeroo_template(records[0], render_context)
+        report_context = self._get_aeroo_context(records[0], render_context)
         report_data = dict(
             data,
             objects=records,
-            company=self._get_aeroo_company(records[0]),
+            company=render_context.company,
             **report_context
         )
 
@@ -661,26 +1355,29 @@ class AerooReportsWithAttachmentFilenamePerLang(models.Model):
         "aeroo.filename.line", "report_id", "Filenames by Language"
     )
 
-    def get_aeroo_filename(self, record, output_format):
+    def get_aeroo_filename(self, record, output_format, render_context=None):
         """Get the attachement filename for the generated report.
 
         :param record: the record for which to generate the freport
+        :param render_context: the evaluated render context of the record, if known
         :return: the filename
         """
         if not self.aeroo_filename_per_lang:
-            return super().get_aeroo_filename(record, output_format)
+            return super().get_aeroo_filename(record, output_format, render_context)
 
-        mako_filename = self._get_aeroo_filename_from_lang(record)
+        mako_filename = self._get_aeroo_filename_from_lang(record, render_context)
         rendered_filename = self._eval_aeroo_attachment_filename(mako_filename, record)
         return ".".join((rendered_filename, output_format))
 
-    def _get_aeroo_filename_from_lang(self, record):
+    def _get_aeroo_filename_from_lang(self, record, render_context=None):
         """Get the attachment filename for the record based on the rendering language.
 
         :param record: the record for which to generate the file name
+        :param render_context: the evaluated render context of the record, if known
         :return: the filename mako template
         """
-        lang = self._get_aeroo_lang(record)
+        render_context = render_context or self._get_aeroo_render_context(record)
+        lang = render_context.lang
 
         def line_matches_lang(line):
             return line.lang_id.code == lang
@@ -701,15 +1398,113 @@ class AerooReportsWithAttachmentFilenamePerLang(models.Model):
         return line.filename
 
 
-def generate_temporary_file(format, data=None):
-    """Generate a temporary file containing the given data.
+class AerooReportsWithRenderStats(models.Model):
+    """Record the statistics of every rendering of an aeroo report.
 
-    :param string format: the extension of the file to create
-    :param bytes data: the data to write in the file
+    The percentiles of the duration of the renderings are shown on the report,
+    so that the templates causing slow prints can be found.
     """
-    temp_file = NamedTemporaryFile(suffix=".%s" % format, delete=False)
-    temp_file.close()
-    if data is not None:
-        with open(temp_file.name, "wb") as f:
-            f.write(data)
-    return temp_file
+
+    _inherit = "ir.actions.report"
+
+    aeroo_render_count = fields.Integer(
+        "Renderings",
+        compute="_compute_aeroo_render_percentiles",
+        groups="report_aeroo.group_aeroo_manager",
+    )
+    aeroo_render_p50 = fields.Float(
+        "Median Duration (ms)",
+        compute="_compute_aeroo_render_percentiles",
+        groups="report_aeroo.group_aeroo_manager",
+    )
+    aeroo_render_p95 = fields.Float(
+        "95th Percentile (ms)",
+        compute="_compute_aeroo_render_percentiles",
+        groups="report_aeroo.group_aeroo_manager",
+    )
+    aeroo_render_p99 = fields.Float(
+        "99th Percentile (ms)",
+        compute="_compute_aeroo_render_percentiles",
+        groups="report_aeroo.group_aeroo_manager",
+    )
+
+    def _compute_aeroo_render_percentiles(self):
+        report_ids = [report_id for report_id in self.ids if isinstance(report_id, int)]
+        percentiles = self.env["aeroo.render.stat"]._get_duration_percentiles(
+            report_ids
+        )
+        for report in self:
+            count, p50, p95, p99 = percentiles.get(report.id, (0, 0.0, 0.0, 0.0))
+            report.aeroo_render_count = count
+            report.aeroo_render_p50 = p50
+            report.aeroo_render_p95 = p95
+            report.aeroo_render_p99 = p99
+
+    def action_view_aeroo_render_stats(self):
+        action = self.env.ref("report_aeroo.action_aeroo_render_stat").read()[0]
+        action["domain"] = [("report_id", "=", self.id)]
+        return action
+
+    def _render_aeroo(self, doc_ids, data=None, force_output_format=None):
+        with self._record_aeroo_render_stat(doc_ids) as stat:
+            content, output_format = super()._render_aeroo(
+                doc_ids, data, force_output_format
+            )
+            stat.update(output_format=output_format, output_size=len(content or b""))
+        return content, output_format
+
+    def _render_aeroo_file(self, doc_ids, data=None, force_output_format=None):
+        with self._record_aeroo_render_stat(doc_ids) as stat:
+            output, output_format = super()._render_aeroo_file(
+                doc_ids, data, force_output_format
+            )
+            size = output.seek(0, os.SEEK_END)
+            output.seek(0)
+            stat.update(output_format=output_format, output_size=size)
+        return output, output_format
+
+    @contextmanager
+    def _record_aeroo_render_stat(self, doc_ids):
+        """Record the statistics of the rendering executed inside the block.
+
+        The block receives a dict where to store the output format
+        and the output size of the rendering.
+
+        :param list doc_ids: the ids of the rendered records
+        """
+        if is_recording_render_stat():
+            yield {}
+            return
+
+        # The values are prepared before rendering, because the transaction
+        # may not be usable anymore if the rendering fails.
+        stat = {
+            "date": fields.Datetime.now(),
+            "report_id": self.id,
+            "model": self.model,
+            "user_id": self.env.uid,
+            "record_count": len(doc_ids),
+            "success": False,
+        }
+        query_count = self.env.cr.sql_log_count
+
+        try:
+            with recording_render_stat(), collect_render_timings() as timings:
+                yield stat
+            stat["success"] = True
+        finally:
+            stat["query_count"] = self.env.cr.sql_log_count - query_count
+            stat["cache_hit"] = bool(doc_ids) and timings.cache_hits >= len(doc_ids)
+            stat["duration"] = timings.total * 1000
+            for stage in RENDER_STAGES:
+                stat["{}_duration".format(stage)] = (
+                    timings.durations.get(stage, 0.0) * 1000
+                )
+            try:
+                self.env["aeroo.render.stat"]._add_stat(stat)
+            except Exception:
+                logger.warning(
+                    "Could not record the statistics of the report %s.",
+                    self.id,
+                    exc_info=True,
+                )
@@ -34,6 +34,14 @@ class MailTemplate(models.Model):
         if not multi_mode:
             results = {res_ids[0]: results}
 
+        records = self.env[self.model].browse(res_ids)
+        file_names = {
+            aeroo_report: aeroo_report.get_aeroo_filenames(
+                records, aeroo_report.aeroo_out_format_id.code
+            )
+            for aeroo_report in self.aeroo_report_ids
+        }
+
         for res_id in res_ids:
             values = results[res_id]
 
@@ -41,9 +49,7 @@ class MailTemplate(models.Model):
                 content, content_type = aeroo_report._render_aeroo([res_id], {})
                 content = base64.b64encode(content)
 
-                record = self.env[self.model].browse(res_id)
-                output_format = aeroo_report.aeroo_out_format_id.code
-                file_name = aeroo_report.get_aeroo_filename(record, output_format)
+                file_name = file_names[aeroo_report][res_id]
 
                 if "attachments" not in values:
                     values["attachments"] = []
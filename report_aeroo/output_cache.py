@@ -0,0 +1,131 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AerooOutputCache(object):
+    """A cache of rendered aeroo documents stored in the filestore.
+
+    Each document is stored in a file named after its cache key.
+
+    The modification time of a file is its expiration time.
+    The access time of a file is updated on each cache hit, so that
+    the least recently used documents are removed first when the cache is full.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Get a rendered document from the cache.
+
+        :param str key: the cache key of the document
+        :return: the document or None if not found or expired
+        :rtype: bytes
+        """
+        path = self.get_path(key)
+        if path is None:
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def get_path(self, key):
+        """Get the path of a rendered document in the cache.
+
+        :param str key: the cache key of the document
+        :return: the path of the file or None if not found or expired
+        :rtype: str
+        """
+        path = self._get_path(key)
+        now = time.time()
+
+        try:
+            expiration = os.stat(path).st_mtime
+            if expiration < now:
+                os.remove(path)
+                return None
+
+            os.utime(path, (now, expiration))
+            return path
+        except OSError:
+            return None
+
+    def set(self, key, data, ttl):
+        """Store a rendered document in the cache.
+
+        :param str key: the cache key of the document
+        :param bytes data: the document
+        :param int ttl: the time to live of the document in seconds
+        """
+        path = self._get_path(key)
+        directory = os.path.dirname(path)
+        now = time.time()
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+                f.write(data)
+            os.utime(f.name, (now, now + ttl))
+            os.replace(f.name, path)
+        except OSError:
+            logger.warning("Could not store the document %s in the cache.", key)
+
+    def clean(self, max_size):
+        """Remove expired documents, then the least recently used documents.
+
+        :param int max_size: the maximum size of the cache in bytes
+        """
+        now = time.time()
+        entries = []
+
+        for root, __, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    if stat.st_mtime < now:
+                        os.remove(path)
+                    else:
+                        entries.append((stat.st_atime, stat.st_size, path))
+                except OSError:
+                    continue
+
+        size = sum(entry[1] for entry in entries)
+
+        for __, file_size, path in sorted(entries):
+            if size <= max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= file_size
+
+
+def get_output_cache_key(values):
+    """Get the key identifying a rendered document in the cache.
+
+    Values that can not be serialized to JSON are rejected, instead of being
+    converted to a string that may change from a process to another.
+
+    :param list values: the values identifying the rendered document
+    :rtype: str
+    :raises TypeError: if a value can not be serialized to JSON
+    """
+    serialized = json.dumps(values, sort_keys=True)
+    return hashlib.sha256(serialized.encode()).hexdigest()
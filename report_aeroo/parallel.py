@@ -0,0 +1,90 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import odoo
+from odoo import api, sql_db
+
+from .render_stat import recording_render_stat
+
+# Connection pools and connections inherited from the parent process.
+# A reference is kept on them, so that the garbage collector never closes
+# database connections shared with the parent process.
+_inherited_connections = []
+
+
+def _init_render_process(dbname):
+    """Initialize a process of the rendering pool.
+
+    The process is forked from an Odoo worker. It must not use the database
+    connections of its parent, so it opens its own connections.
+
+    The registry of the database keeps a connection bound to the pool of the
+    parent process. It is replaced by a connection bound to a new pool.
+
+    :param str dbname: the database of the rendering
+    """
+    registry = odoo.registry(dbname)
+    _inherited_connections.append((sql_db._Pool, registry._db))
+    sql_db._Pool = None
+    registry._db = sql_db.db_connect(dbname)
+
+
+def _render_record(args):
+    """Render an aeroo report for a single record inside a process of the pool.
+
+    The record is rendered with a new database cursor.
+    Therefore, only committed data is visible to the report.
+
+    The statistics of the rendering are recorded by the parent process
+    for all records, so the process records none of its own.
+
+    :return: the rendered report
+    :rtype: bytes
+    """
+    dbname, uid, su, context, report_id, record_id, data, output_format = args
+
+    registry = odoo.registry(dbname)
+    with recording_render_stat(), api.Environment.manage(), registry.cursor() as cr:
+        env = api.Environment(cr, uid, context, su=su)
+        report = env["ir.actions.report"].browse(report_id)
+        return report._render_aeroo([record_id], data, output_format)[0]
+
+
+def render_in_parallel(report, doc_ids, data, output_format, workers):
+    """Render an aeroo report for multiple records using a pool of processes.
+
+    Each process renders one record at a time, using its own database cursor
+    and its own Libreoffice conversion backend.
+
+    :param report: the aeroo report to render
+    :param list doc_ids: the ids of the records
+    :param dict data: the data to send to the report as context
+    :param str output_format: the output format of the report
+    :param int workers: the maximum number of processes
+    :return: an iterator over the rendered reports in the same order as doc_ids
+    """
+    env = report.env
+    tasks = [
+        (
+            env.cr.dbname,
+            env.uid,
+            env.su,
+            dict(env.context),
+            report.id,
+            record_id,
+            data,
+            output_format,
+        )
+        for record_id in doc_ids
+    ]
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init_render_process,
+        initargs=(env.cr.dbname,),
+    ) as executor:
+        yield from executor.map(_render_record, tasks)
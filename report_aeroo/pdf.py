@@ -0,0 +1,77 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+from io import BytesIO
+from PyPDF2 import PdfFileReader, PdfFileWriter
+from tempfile import SpooledTemporaryFile
+
+# Intermediate merged documents bigger than this size are written to the disk.
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+
+class PdfMergeError(Exception):
+    """Error raised when pdf documents could not be merged."""
+
+
+def merge_pdf(pdfs, output, chunk_size=50):
+    """Merge pdf documents together.
+
+    The documents are merged by chunks. Each chunk is merged into an intermediate
+    document (written to disk when it is big), then the intermediate documents
+    are merged together. Therefore, the rendered documents do not need to be
+    held in memory until the end of the rendering.
+
+    This does not bound the memory used by the merge: the last merge holds
+    every page of the output before writing it, because PyPDF2 can not write
+    a document incrementally.
+
+    :param pdfs: an iterable of pdf documents (bytes or binary file objects).
+        The iterable is consumed lazily, so documents can be merged while
+        the next ones are being rendered.
+    :param output: the binary file object where to write the merged document
+    :param int chunk_size: the number of documents merged at the same time
+    """
+    chunk_size = max(chunk_size, 2)
+    merged_chunks = []
+    chunk = []
+
+    for pdf in pdfs:
+        chunk.append(pdf)
+        if len(chunk) == chunk_size:
+            merged_chunks.append(_merge_chunk_to_spool(chunk))
+            chunk = []
+
+    if not merged_chunks:
+        _merge_chunk(chunk, output)
+        return
+
+    if chunk:
+        merged_chunks.append(_merge_chunk_to_spool(chunk))
+
+    try:
+        merge_pdf(merged_chunks, output, chunk_size)
+    finally:
+        for spool in merged_chunks:
+            spool.close()
+
+
+def _merge_chunk_to_spool(pdfs):
+    spool = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    _merge_chunk(pdfs, spool)
+    spool.seek(0)
+    return spool
+
+
+def _merge_chunk(pdfs, output):
+    writer = PdfFileWriter()
+
+    try:
+        for pdf in pdfs:
+            stream = BytesIO(pdf) if isinstance(pdf, bytes) else pdf
+            reader = PdfFileReader(stream, strict=False)
+            for page_number in range(reader.getNumPages()):
+                writer.addPage(reader.getPage(page_number))
+
+        writer.write(output)
+    except Exception as exc:
+        raise PdfMergeError(exc)
@@ -0,0 +1,59 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+import threading
+from contextlib import contextmanager
+from typing import Any, NamedTuple
+
+_local = threading.local()
+
+
+class AerooRenderContext(NamedTuple):
+    """The values evaluated once per record from the expressions of a report.
+
+    The values are immutable, so that the same context can be passed safely
+    to the template selection, the filename and the rendering of a record.
+    """
+
+    lang: str
+    tz: str
+    company: Any
+    country: Any
+    currency: Any
+
+
+@contextmanager
+def caching_render_contexts():
+    """Memoize the render contexts evaluated inside the block.
+
+    The render context of a record is needed by the template selection,
+    the filename, the cache key and the rendering. Inside the block,
+    it is evaluated once per report and record.
+
+    A block nested inside another block uses the memo of the outer block.
+    """
+    if getattr(_local, "memo", None) is not None:
+        yield
+        return
+
+    _local.memo = {}
+    try:
+        yield
+    finally:
+        _local.memo = None
+
+
+def get_memoized_render_context(key, evaluate):
+    """Get a render context from the memo of the current block.
+
+    :param key: a tuple identifying the report, the record and the cursor
+    :param evaluate: a function without parameter that evaluates the context
+    :rtype: AerooRenderContext
+    """
+    memo = getattr(_local, "memo", None)
+    if memo is None:
+        return evaluate()
+
+    if key not in memo:
+        memo[key] = evaluate()
+    return memo[key]
@@ -0,0 +1,66 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+import threading
+import time
+from contextlib import contextmanager
+
+_local = threading.local()
+
+# The stages of a rendering measured in the statistics.
+RENDER_STAGES = ("context", "template", "generate", "convert", "merge", "attachment")
+
+
+class RenderStatBuffer(object):
+    """The statistics of renderings waiting to be written in the database.
+
+    The statistics are written by batches, so that a rendering
+    never waits for its statistics to be written.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}
+
+    def add(self, dbname, values, batch_size, interval):
+        """Add the statistics of a rendering to the buffer.
+
+        :param str dbname: the database of the rendering
+        :param dict values: the values of the statistics
+        :param int batch_size: the number of rows written at once
+        :param int interval: the maximum time in seconds before writing the rows
+        :return: the rows to write now, or an empty list
+        """
+        now = time.time()
+
+        with self._lock:
+            since, rows = self._rows.setdefault(dbname, (now, []))
+            rows.append(values)
+
+            if len(rows) >= batch_size or now - since >= interval:
+                del self._rows[dbname]
+                return rows
+
+        return []
+
+
+render_stat_buffer = RenderStatBuffer()
+
+
+@contextmanager
+def recording_render_stat():
+    """Mark the current thread as recording the statistics of a rendering.
+
+    A rendering nested inside another rendering (i.e. a pdf rendered for each
+    record before merging the documents) has no statistics of its own.
+    """
+    previous = getattr(_local, "recording", False)
+    _local.recording = True
+    try:
+        yield
+    finally:
+        _local.recording = previous
+
+
+def is_recording_render_stat():
+    return getattr(_local, "recording", False)
@@ -17,13 +17,49 @@ ActionManager.include({
      */
     _executeReportAction(action, options) {
         if (action.report_type === "aeroo") {
-            return this._printAerooReport(action, options).then(() => {
-                return this._afterAerooReportDownloaded(action, options);
+            return this._startAerooReportJob(action).then((jobId) => {
+                if (jobId) {
+                    return this._showAerooReportJob(jobId);
+                }
+                return this._printAerooReport(action, options).then(() => {
+                    return this._afterAerooReportDownloaded(action, options);
+                });
             });
         } else {
             return this._super(action, options);
         }
     },
+    /**
+     * Render the aeroo report in background if it contains too many records.
+     *
+     * The promise resolves with the id of the render job or false
+     * if the report must be downloaded directly.
+     */
+    _startAerooReportJob(action) {
+        const recordIds = action.context.active_ids || [];
+        if (recordIds.length <= 1) {
+            return Promise.resolve(false);
+        }
+        return this._rpc({
+            route: "/web/report_aeroo/job",
+            params: {
+                report_id: action.id,
+                record_ids: recordIds,
+            },
+        }).then((result) => result.job_id);
+    },
+    /**
+     * Open the render job of an aeroo report, so that its progress can be followed.
+     */
+    _showAerooReportJob(jobId) {
+        return this.doAction({
+            type: "ir.actions.act_window",
+            res_model: "aeroo.render.job",
+            res_id: jobId,
+            views: [[false, "form"]],
+            target: "new",
+        });
+    },
     /**
      * After the aeroo report is downloaded, execute post actions.
      *
@@ -0,0 +1,161 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+import hashlib
+import threading
+import zipfile
+from aeroolib.plugins.opendocument import Template, OOSerializer
+from io import BytesIO
+
+from odoo.tools import config
+from odoo.addons.mail.models.mail_render_mixin import jinja_template_env
+
+from .cache import LRUCache
+
+
+class CompiledAerooTemplate(object):
+    """An aeroo template parsed and compiled once, then rendered many times.
+
+    Parsing a template unzips the document and compiles every Genshi directive
+    contained in content.xml and styles.xml. Only the generation of the output
+    is required to render the template for another record.
+
+    The serializer of an aeroo template writes into a single output document.
+    Therefore, a new serializer is given to the compiled template for each rendering.
+    """
+
+    def __init__(self, data):
+        """Compile the template.
+
+        :param bytes data: the binary content of the Libreoffice template
+        """
+        self._data = data
+        self._lock = threading.Lock()
+
+        template_io = BytesIO()
+        template_io.write(data)
+        self._template = Template(
+            source=template_io, serializer=OOSerializer(template_io)
+        )
+        self.size = _get_uncompressed_size(data)
+
+    def render(self, context):
+        """Render the template with the given Genshi context.
+
+        :return: the rendered document
+        :rtype: bytes
+        """
+        with self._lock:
+            serializer = OOSerializer(BytesIO(self._data))
+            serializer.template = self._template
+            self._template.Serializer = serializer
+            return self._template.generate(context).render().getvalue()
+
+
+def _get_uncompressed_size(data):
+    """Get the size of the xml files contained in an Open Document.
+
+    This size is used as an approximation of the memory used by the compiled template.
+    """
+    with zipfile.ZipFile(BytesIO(data)) as document:
+        return sum(
+            info.file_size
+            for info in document.infolist()
+            if info.filename.endswith(".xml")
+        )
+
+
+class TemplateData(bytes):
+    """The binary content of a cached template.
+
+    The hash of the content is computed once, then reused
+    for every document rendered with the template.
+    """
+
+    _hash = None
+
+    @property
+    def hash(self):
+        if self._hash is None:
+            self._hash = hashlib.sha1(self).hexdigest()
+        return self._hash
+
+
+def get_template_hash(data):
+    """Get a hash identifying the content of a template.
+
+    :param bytes data: the binary content of the Libreoffice template
+    """
+    if isinstance(data, TemplateData):
+        return data.hash
+    return hashlib.sha1(data).hexdigest()
+
+
+compiled_template_cache = LRUCache(
+    max_size=int(config.get("aeroo_template_cache_size") or 64) * 1024 * 1024,
+    sizeof=lambda template: template.size,
+)
+
+
+def get_compiled_template(data):
+    """Get the compiled version of the given template.
+
+    Compiled templates are shared by all reports of the process.
+    They are identified by the hash of their content.
+
+    :param bytes data: the binary content of the Libreoffice template
+    :rtype: CompiledAerooTemplate
+    """
+    return compiled_template_cache.get_or_set(
+        get_template_hash(data), lambda: CompiledAerooTemplate(data)
+    )
+
+
+template_data_cache = LRUCache(
+    max_size=int(config.get("aeroo_template_data_cache_size") or 64) * 1024 * 1024,
+    sizeof=lambda entry: len(entry[1]),
+)
+
+
+def get_cached_template_data(key, version, loader):
+    """Get the binary content of a template from the cache.
+
+    :param key: a tuple identifying the source of the template
+    :param version: a value that changes when the template is modified
+        (i.e. the write_date of a record or the modification time of a file)
+    :param loader: a function without parameter that loads the template
+    :return: the binary content of the template
+    :rtype: TemplateData
+    """
+    entry = template_data_cache.get(key)
+
+    if entry is None or entry[0] != version:
+        entry = (version, TemplateData(loader()))
+        template_data_cache.set(key, entry)
+
+    return entry[1]
+
+
+def invalidate_template_data(key):
+    """Remove the content of a template from the cache.
+
+    :param key: the tuple identifying the source of the template
+    """
+    template_data_cache.pop(key)
+
+
+filename_template_cache = LRUCache(max_size=1024)
+
+
+def get_filename_template(source):
+    """Get the compiled jinja template of an attachment filename.
+
+    Compiled templates are cached by source string, so that a filename
+    is compiled again as soon as it is modified.
+
+    :param str source: the source of the filename template
+    :rtype: jinja2.Template
+    """
+    return filename_template_cache.get_or_set(
+        source, lambda: jinja_template_env.from_string(source)
+    )
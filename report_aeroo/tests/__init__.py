@@ -3,9 +3,19 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
 from . import (
+    test_barcode,
+    test_cache,
     test_email_template,
     test_extra_functions,
+    test_formatting,
+    test_libreoffice,
+    test_output_cache,
+    test_pdf,
+    test_render_job,
+    test_render_stat,
     test_report_aeroo,
     test_report_aeroo_company_eval,
     test_report_aeroo_lang_eval,
+    test_sendfile,
+    test_timing,
 )
@@ -0,0 +1,105 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import pytest
+import qrcode
+from PIL import Image, ImageDraw
+from xml.etree import ElementTree
+from ..barcode.code128 import encode_message, get_code, get_layout
+from ..barcode.code39 import create_c39, layout_c39
+from ..barcode.EANBarCode import EanBarCode
+from ..barcode.qr import get_qr_layout, make_qr_code
+from ..barcode.render import BarcodeLayout, get_font, make_bitmap, paste_bars
+from ..barcode.svg import render_svg
+
+
+def _draw_code128(message, xw, h):
+    """Draw a code128 barcode pixel by pixel, as the original implementation."""
+    widths = [xw * 20] + encode_message(message) + [xw * 20]
+    bits = []
+    i = 1
+    for w in widths:
+        bits = bits + [i] * w * xw
+        i = 1 - i
+
+    image = Image.new("1", (len(bits), h), 1)
+    for b in range(len(bits)):
+        for y in range(h):
+            image.putpixel((b, y), 255 * bits[b])
+    return image
+
+
+def test_bitmap_rows_repeated_over_height():
+    image = make_bitmap([True, False, False, True], 3)
+    assert image.size == (4, 3)
+    assert [image.getpixel((x, 2)) for x in range(4)] == [255, 0, 0, 255]
+
+
+def test_pasted_bars_identical_to_drawn_lines():
+    row = [False, True, True, False, True]
+    pasted = Image.new("RGB", (5, 20), "white")
+    paste_bars(pasted, row, 2, 15)
+
+    drawn = Image.new("RGB", (5, 20), "white")
+    draw = ImageDraw.Draw(drawn)
+    for x, bar in enumerate(row):
+        if bar:
+            draw.line((x, 2, x, 15), fill=0)
+
+    assert pasted.tobytes() == drawn.tobytes()
+
+
+@pytest.mark.parametrize("message, xw, h", [("HELLO123", 1, 50), ("abc 9", 2, 20)])
+def test_code128_identical_to_pixel_drawing(message, xw, h):
+    expected = _draw_code128(message, xw, h)
+    assert get_code(message, xw, h).tobytes() == expected.tobytes()
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "1234",
+        "https://example.com/" + "x" * 100,
+        "https://example.com/" + "x" * 400,
+        "".join(chr(i) for i in range(32, 127)) * 3,
+    ],
+)
+def test_qr_code_identical_to_qrcode_image(code):
+    qr = qrcode.QRCode(box_size=10)
+    qr.add_data(code)
+    qr.make(fit=True)
+    expected = qr.make_image(fill_color="black", back_color="white")
+    image = make_qr_code(code)
+    assert image.size == expected.size
+    assert image.tobytes() == expected.tobytes()
+
+
+def test_font_loaded_once():
+    assert get_font(12) is get_font(12)
+
+
+@pytest.mark.parametrize(
+    "layout, image",
+    [
+        (get_layout("HELLO123", 2, 50), get_code("HELLO123", 2, 50)),
+        (layout_c39(50, 1, "1234"), create_c39(50, 1, "1234")),
+        (EanBarCode().getLayout("501234567890"), EanBarCode().getImage("501234567890")),
+        (get_qr_layout("1234"), make_qr_code("1234")),
+    ],
+)
+def test_svg_has_the_size_of_the_png_image(layout, image):
+    svg = ElementTree.fromstring(render_svg(layout))
+    assert (int(svg.get("width")), int(svg.get("height"))) == image.size
+
+
+def test_svg_bars_merged_into_rectangles():
+    layout = BarcodeLayout(6, 10, [([True, True, False, True, False, True], 2, 5)], [])
+    svg = ElementTree.fromstring(render_svg(layout))
+    path = svg.find("{http://www.w3.org/2000/svg}path")
+    assert path.get("d") == "M0 2h2v4h-2zM3 2h1v4h-1zM5 2h1v4h-1z"
+
+
+def test_svg_text_escaped():
+    layout = BarcodeLayout(10, 10, [], [(0, 0, "A&B", 12)])
+    svg = ElementTree.fromstring(render_svg(layout))
+    assert svg.find("{http://www.w3.org/2000/svg}text").text == "A&B"
@@ -0,0 +1,122 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import base64
+from unittest import mock
+from odoo.tests import common
+from ..cache import LRUCache
+from ..template import (
+    compiled_template_cache,
+    get_cached_template_data,
+    get_template_hash,
+    template_data_cache,
+)
+
+
+def test_cache_hit_and_miss():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_evicted():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_eviction_based_on_value_size():
+    cache = LRUCache(max_size=10, sizeof=len)
+    cache.set("a", b"12345")
+    cache.set("b", b"123456")
+    assert "a" not in cache
+    assert "b" in cache
+
+
+def test_value_bigger_than_cache_not_stored():
+    cache = LRUCache(max_size=10, sizeof=len)
+    cache.set("a", b"12345678901")
+    assert "a" not in cache
+
+
+def test_get_or_set_computes_value_once():
+    cache = LRUCache(max_size=10)
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return "value"
+
+    assert cache.get_or_set("a", factory) == "value"
+    assert cache.get_or_set("a", factory) == "value"
+    assert len(calls) == 1
+
+
+class TestCompiledTemplateCache(common.SavepointCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env["res.partner"].create({"name": "My Partner"})
+        cls.report = cls.env.ref("report_aeroo.aeroo_sample_report")
+        cls.report.aeroo_out_format_id = cls.env.ref(
+            "report_aeroo.aeroo_mimetype_odt_odt"
+        )
+
+    def test_template_compiled_once(self):
+        compiled_template_cache.clear()
+        self.report._render_aeroo([self.partner.id])
+        hits = compiled_template_cache.hits
+        self.report._render_aeroo([self.partner.id])
+        assert compiled_template_cache.hits == hits + 1
+        assert len(compiled_template_cache) == 1
+
+
+class TestTemplateDataCache(common.SavepointCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.report = cls.env.ref("report_aeroo.aeroo_sample_report")
+        cls.template = bytes(cls.report._get_aeroo_template_from_file())
+        cls.report.write(
+            {
+                "aeroo_template_source": "database",
+                "aeroo_template_data": base64.b64encode(cls.template),
+            }
+        )
+
+    def test_template_from_database_is_cached(self):
+        self.report._get_aeroo_template_from_database()
+        hits = template_data_cache.hits
+        assert self.report._get_aeroo_template_from_database() == self.template
+        assert template_data_cache.hits == hits + 1
+
+    def test_template_hash_computed_once(self):
+        data = get_cached_template_data(("test", "hash"), 1, lambda: b"template")
+        get_template_hash(data)
+        with mock.patch("hashlib.sha1") as sha1:
+            get_template_hash(data)
+        sha1.assert_not_called()
+
+    def test_cache_invalidated_when_report_is_written(self):
+        self.report._get_aeroo_template_from_database()
+        self.report.aeroo_template_data = base64.b64encode(b"new template")
+        assert self.report._get_aeroo_template_from_database() == b"new template"
+
+    def test_cache_invalidated_when_template_line_is_written(self):
+        line = self.env["aeroo.template.line"].create(
+            {
+                "report_id": self.report.id,
+                "template_data": base64.b64encode(self.template),
+            }
+        )
+        line.get_aeroo_template(None)
+        line.template_data = base64.b64encode(b"new template")
+        assert line.get_aeroo_template(None) == b"new template"
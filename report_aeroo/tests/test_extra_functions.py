@@ -1,15 +1,20 @@
 # Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+import base64
 import io
 import pytest
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
+from unittest import mock
 from ddt import data, ddt, unpack
 from freezegun import freeze_time
 from odoo.exceptions import ValidationError
 from odoo.tests import common
+from odoo.tools import config
+from PIL import Image
 from ..extra_functions import (
+    asimage,
     barcode,
     qrcode,
     format_date,
@@ -20,7 +25,10 @@ from ..extra_functions import (
     format_currency,
     format_hours,
     format_html2text,
+    get_image_cache_stats,
     group_by,
+    image_cache,
+    _read_image_variant,
 )
 
 
@@ -242,6 +250,121 @@ class TestAerooReport(common.TransactionCase):
         assert result[2] == "4.31cm"
         assert result[3] == "4.31cm"
 
+    def test_barcode_returned_from_cache(self):
+        first = barcode(self.report, "1234", "code128")
+        hits = image_cache.hits
+        second = barcode(self.report, "1234", "code128")
+        assert image_cache.hits == hits + 1
+        assert first[0] is not second[0]
+        assert first[0].getvalue() == second[0].getvalue()
+        assert first[1:] == second[1:]
+
+    def test_barcode_with_other_height_not_returned_from_cache(self):
+        first = barcode(self.report, "1234", "code128", height=50)
+        second = barcode(self.report, "1234", "code128", height=60)
+        assert first[0].getvalue() != second[0].getvalue()
+
+    def test_qrcode_returned_from_cache(self):
+        qrcode(self.report, "1234", "4.31cm")
+        hits = get_image_cache_stats()["hits"]
+        result = qrcode(self.report, "1234", "4.31cm")
+        assert get_image_cache_stats()["hits"] == hits + 1
+        assert result[2] == "4.31cm"
+
+    @data(
+        ("ean13", "501234567890"),
+        ("code128", "1234"),
+        ("code39", "1234"),
+    )
+    @unpack
+    def test_render_vector_barcode(self, barcode_type, code):
+        png = barcode(self.report, code, barcode_type)
+        svg = barcode(self.report, code, barcode_type, vector=True)
+        assert svg[0].getvalue().startswith(b"<svg")
+        assert svg[1] == "image/svg+xml"
+        assert svg[2:] == png[2:]
+
+    def test_vector_barcodes_option_on_report(self):
+        self.report.aeroo_vector_barcodes = True
+        assert barcode(self.report, "1234", "code128")[1] == "image/svg+xml"
+        assert qrcode(self.report, "1234")[1] == "image/svg+xml"
+
+    def test_vector_barcodes_option_overridden_in_template(self):
+        self.report.aeroo_vector_barcodes = True
+        assert barcode(self.report, "1234", "code128", vector=False)[1] == "image/png"
+
+    def test_vector_qrcode__specific_dimension(self):
+        result = qrcode(self.report, "1234", "4.31cm", vector=True)
+        assert result[1] == "image/svg+xml"
+        assert result[2] == "4.31cm"
+        assert result[3] == "4.31cm"
+
+    def _make_image_value(self, size, image_format="jpeg"):
+        stream = io.BytesIO()
+        Image.new("RGB", size, "red").save(stream, image_format)
+        return base64.encodebytes(stream.getvalue())
+
+    def _open_image(self, result):
+        return Image.open(io.BytesIO(result[0].getvalue()))
+
+    def test_asimage_downscaled_to_printed_size(self):
+        value = self._make_image_value((1920, 1080))
+        result = asimage(self.report, value, size_x=2, uom="cm", hold_ratio=True)
+        assert self._open_image(result).size == (236, 133)
+        assert result[1] == "image/jpeg"
+        assert result[2] == str(2 / 2.54) + "in"
+
+    def test_asimage_without_size_not_downscaled(self):
+        value = self._make_image_value((1920, 1080))
+        result = asimage(self.report, value)
+        assert result[0].getvalue() == base64.decodebytes(value)
+        assert result[2] == "20.0in"
+        assert result[3] == "11.25in"
+
+    def test_asimage_not_upscaled(self):
+        value = self._make_image_value((100, 100), "png")
+        result = asimage(self.report, value, size_x=5, size_y=5, uom="in")
+        assert self._open_image(result).size == (100, 100)
+        assert result[2] == "5in"
+
+    def test_asimage_returned_from_cache(self):
+        value = self._make_image_value((400, 400))
+        asimage(self.report, value, size_x=1, size_y=1, uom="in")
+        hits = image_cache.hits
+        result = asimage(self.report, value, size_x=1, size_y=1, uom="in")
+        assert image_cache.hits == hits + 1
+        assert self._open_image(result).size == (300, 300)
+
+    def test_asimage_reads_smallest_sufficient_variant(self):
+        partner = self.env["res.partner"].create(
+            {"name": "Partner", "image_1920": self._make_image_value((1920, 1920))}
+        )
+        value = _read_image_variant(partner, "image_1920", 1, 1, "cm", False)
+        assert value == partner.image_128
+
+        value = _read_image_variant(partner, "image_1920", 3, None, "cm", True)
+        assert value == partner.image_512
+
+        result = asimage(self.report, partner, size_x=1, size_y=1, uom="cm")
+        assert self._open_image(result).size == (118, 118)
+
+    @data((96, "image_128"), (600, "image_256"), (1200, "image_512"))
+    @unpack
+    def test_asimage_variant_selected_with_image_dpi(self, dpi, variant):
+        partner = self.env["res.partner"].create(
+            {"name": "Partner", "image_1920": self._make_image_value((1920, 1920))}
+        )
+        with mock.patch.dict(config.options, {"aeroo_image_dpi": dpi}):
+            value = _read_image_variant(partner, "image_1920", 1, 1, "cm", False)
+        assert value == partner[variant]
+
+    def test_asimage_reads_given_variant_without_size(self):
+        partner = self.env["res.partner"].create(
+            {"name": "Partner", "image_1920": self._make_image_value((1920, 1920))}
+        )
+        result = asimage(self.report, partner, field="image_512")
+        assert self._open_image(result).size == (512, 512)
+
 
 class TestGroupBy(common.SavepointCase):
     @classmethod
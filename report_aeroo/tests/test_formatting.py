@@ -0,0 +1,56 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import pytest
+from babel.dates import DateTimePattern
+from babel.numbers import NumberPattern
+from ..formatting import (
+    get_datetime_pattern,
+    get_locale,
+    get_locale_from_lang_and_country_code,
+    get_number_pattern,
+    get_timezone,
+    preload_locales,
+)
+
+
+def test_locale_parsed_once():
+    assert get_locale("fr_CA") is get_locale("fr_CA")
+    assert str(get_locale("fr_CA")) == "fr_CA"
+
+
+def test_number_pattern_parsed_once():
+    pattern = get_number_pattern("#,##0.00")
+    assert isinstance(pattern, NumberPattern)
+    assert get_number_pattern("#,##0.00") is pattern
+
+
+def test_empty_number_pattern_not_parsed():
+    assert get_number_pattern(None) is None
+
+
+def test_datetime_pattern_parsed_once():
+    pattern = get_datetime_pattern("d MMMM yyyy")
+    assert isinstance(pattern, DateTimePattern)
+    assert get_datetime_pattern("d MMMM yyyy") is pattern
+
+
+@pytest.mark.parametrize("pattern", [None, "short", "medium", "long", "full"])
+def test_named_datetime_format_not_parsed(pattern):
+    assert get_datetime_pattern(pattern) == pattern
+
+
+@pytest.mark.parametrize(
+    "lang, country_code, expected",
+    [("fr_FR", "CA", "fr_CA"), ("en_US", "CA", "en_CA"), ("fr_FR", "XX", "fr_FR")],
+)
+def test_locale_from_lang_and_country_code(lang, country_code, expected):
+    assert get_locale_from_lang_and_country_code(lang, country_code) == expected
+
+
+def test_timezone_loaded_once():
+    assert get_timezone("America/Montreal") is get_timezone("America/Montreal")
+
+
+def test_preload_unknown_locale():
+    preload_locales(["fr_CA", "xx_XX"])
@@ -0,0 +1,168 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import os
+import pytest
+import subprocess
+import sys
+import tempfile
+import types
+from unittest import mock
+from ..libreoffice import (
+    LibreofficeCommandLine,
+    LibreofficeConverter,
+    LibreofficeDaemonPool,
+    LibreofficeError,
+    LibreofficeInstance,
+    _get_process_start_time,
+    get_converter,
+)
+
+
+def test_command_line_backend_used_by_default():
+    assert isinstance(get_converter({}), LibreofficeCommandLine)
+
+
+def test_daemon_backend_selected_from_config():
+    config = {
+        "aeroo_libreoffice_backend": "daemon",
+        "aeroo_libreoffice_pool_size": "3",
+        "aeroo_libreoffice_pool_dir": tempfile.mkdtemp(),
+    }
+    converter = get_converter(config)
+    assert isinstance(converter, LibreofficeDaemonPool)
+    assert converter.size == 3
+
+
+def test_same_daemon_pool_returned_for_same_config():
+    config = {
+        "aeroo_libreoffice_backend": "daemon",
+        "aeroo_libreoffice_pool_dir": tempfile.mkdtemp(),
+    }
+    assert get_converter(config) is get_converter(dict(config))
+
+
+def test_daemon_pool_with_unsupported_conversion():
+    pool = LibreofficeDaemonPool(directory=tempfile.mkdtemp())
+    with pytest.raises(LibreofficeError):
+        pool.convert(b"", "odt", "xls", timeout=1)
+
+
+class FailingConverter(LibreofficeCommandLine):
+    def convert(self, data, in_format, output_format, timeout):
+        if data == b"invalid":
+            raise LibreofficeError("Invalid document")
+        return data
+
+
+def test_convert_many_reports_index_of_failing_document():
+    converter = FailingConverter()
+    with pytest.raises(LibreofficeError) as exc:
+        LibreofficeConverter.convert_many(
+            converter, [b"a", b"invalid", b"c"], "odt", "pdf", timeout=1
+        )
+    assert exc.value.index == 1
+
+
+@pytest.fixture
+def process_group():
+    process = subprocess.Popen(
+        ["sh", "-c", "sleep 30 & sleep 30"], start_new_session=True
+    )
+    yield process
+    os.killpg(process.pid, 9)
+    process.wait()
+
+
+def _make_instance(pid):
+    instance = LibreofficeInstance(tempfile.mkdtemp(), 0)
+    instance.pid = pid
+    instance.start_time = _get_process_start_time(pid)
+    return instance
+
+
+def test_pid_of_unrelated_process_not_considered_running(process_group):
+    instance = _make_instance(process_group.pid)
+    assert not instance.is_running()
+
+
+def test_pid_reused_by_another_process_not_considered_running():
+    instance = _make_instance(os.getpid())
+    instance.start_time -= 1
+    assert not instance.is_running()
+
+
+def test_unrelated_process_not_killed_when_stopping_instance(process_group):
+    instance = _make_instance(process_group.pid)
+    instance.stop()
+    assert process_group.poll() is None
+
+
+def test_memory_of_whole_process_group(process_group):
+    instance = _make_instance(process_group.pid)
+    with open("/proc/{}/statm".format(process_group.pid)) as f:
+        leader_memory = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    assert instance.get_memory() > leader_memory
+
+
+def test_instance_killed_when_conversion_times_out(process_group):
+    instance = _make_instance(process_group.pid)
+
+    def convert_document(*args):
+        process_group.wait()
+        raise RuntimeError("The bridge was disposed.")
+
+    with mock.patch.object(instance, "_convert_document", convert_document):
+        with pytest.raises(LibreofficeError):
+            instance.convert(b"", "odt", "pdf", "writer_pdf_Export", timeout=0.1)
+
+
+class NoConnectException(Exception):
+    pass
+
+
+@pytest.fixture
+def uno_modules():
+    connection = types.ModuleType("com.sun.star.connection")
+    connection.NoConnectException = NoConnectException
+    modules = {
+        "uno": types.ModuleType("uno"),
+        "com": types.ModuleType("com"),
+        "com.sun": types.ModuleType("com.sun"),
+        "com.sun.star": types.ModuleType("com.sun.star"),
+        "com.sun.star.connection": connection,
+    }
+    with mock.patch.dict(sys.modules, modules):
+        yield
+
+
+def test_connection_retried_until_instance_ready(uno_modules):
+    instance = LibreofficeInstance(tempfile.mkdtemp(), 0)
+    connect = mock.Mock(side_effect=[NoConnectException(), NoConnectException(), 1])
+    with mock.patch.object(instance, "_connect", connect):
+        instance._wait_until_ready(timeout=30)
+    assert connect.call_count == 3
+
+
+def test_instance_not_ready_after_timeout(uno_modules):
+    instance = LibreofficeInstance(tempfile.mkdtemp(), 0)
+    connect = mock.Mock(side_effect=NoConnectException())
+    with mock.patch.object(instance, "_connect", connect):
+        with pytest.raises(LibreofficeError):
+            instance._wait_until_ready(timeout=0)
+
+
+def test_unexpected_connection_error_raised_immediately(uno_modules):
+    instance = LibreofficeInstance(tempfile.mkdtemp(), 0)
+    connect = mock.Mock(side_effect=RuntimeError("Programming error"))
+    with mock.patch.object(instance, "_connect", connect):
+        with pytest.raises(RuntimeError):
+            instance._wait_until_ready(timeout=30)
+    connect.assert_called_once()
+
+
+def test_missing_uno_module_raised_immediately():
+    instance = LibreofficeInstance(tempfile.mkdtemp(), 0)
+    with mock.patch.dict(sys.modules, {"uno": None}):
+        with pytest.raises(ImportError):
+            instance._wait_until_ready(timeout=30)
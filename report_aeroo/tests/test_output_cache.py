@@ -0,0 +1,148 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import os
+import pytest
+import tempfile
+import time
+from unittest import mock
+from odoo.tests import common
+from ..output_cache import AerooOutputCache, get_output_cache_key
+
+
+def test_cached_document_returned():
+    cache = AerooOutputCache(tempfile.mkdtemp())
+    cache.set("abcd", b"document", ttl=60)
+    assert cache.get("abcd") == b"document"
+
+
+def test_expired_document_not_returned():
+    cache = AerooOutputCache(tempfile.mkdtemp())
+    cache.set("abcd", b"document", ttl=-1)
+    assert cache.get("abcd") is None
+
+
+def test_least_recently_used_documents_removed_first():
+    cache = AerooOutputCache(tempfile.mkdtemp())
+    cache.set("aaaa", b"1234", ttl=60)
+    cache.set("bbbb", b"1234", ttl=60)
+    path = os.path.join(cache.directory, "aa", "aaaa")
+    os.utime(path, (time.time() - 10, os.stat(path).st_mtime))
+    cache.clean(max_size=4)
+    assert cache.get("aaaa") is None
+    assert cache.get("bbbb") == b"1234"
+
+
+def test_cache_key_rejects_values_not_serializable():
+    with pytest.raises(TypeError):
+        get_output_cache_key([object()])
+
+
+class TestReportOutputCache(common.SavepointCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env["res.partner"].create({"name": "My Partner"})
+        cls.env.cr.execute(
+            "UPDATE res_partner SET write_date = now() - interval '1 day' "
+            "WHERE id = %s",
+            (cls.partner.id,),
+        )
+        cls.partner.invalidate_cache()
+        cls.report = cls.env.ref("report_aeroo.aeroo_sample_report")
+        cls.report.write(
+            {
+                "aeroo_output_cache": True,
+                "aeroo_out_format_id": cls.env.ref(
+                    "report_aeroo.aeroo_mimetype_odt_odt"
+                ).id,
+            }
+        )
+        cls.directory = tempfile.mkdtemp()
+
+    def _render(self):
+        with mock.patch.object(
+            type(self.report),
+            "_get_aeroo_output_cache",
+            return_value=AerooOutputCache(self.directory),
+        ):
+            return self.report._render_aeroo([self.partner.id])[0]
+
+    def test_second_rendering_returned_from_cache(self):
+        output = self._render()
+        with mock.patch.object(
+            type(self.report), "_render_aeroo_document"
+        ) as render_document:
+            assert self._render() == output
+        render_document.assert_not_called()
+
+    def test_record_modified_in_transaction_not_cached(self):
+        self._render()
+        self.partner.name = "New Name"
+        with mock.patch.object(
+            type(self.report), "_render_aeroo_document", return_value=b"new"
+        ):
+            assert self._render() == b"new"
+
+    def test_etag_identical_for_same_document(self):
+        etag = self.report._get_aeroo_etag([self.partner.id], "odt")
+        assert etag
+        assert self.report._get_aeroo_etag([self.partner.id], "odt") == etag
+
+    def test_etag_changed_with_output_format(self):
+        etag = self.report._get_aeroo_etag([self.partner.id], "odt")
+        assert self.report._get_aeroo_etag([self.partner.id], "pdf") != etag
+
+    def test_etag_changed_with_render_context(self):
+        etag = self.report._get_aeroo_etag([self.partner.id], "odt")
+        self.report.aeroo_tz_eval = "'America/Montreal'"
+        assert self.report._get_aeroo_etag([self.partner.id], "odt") != etag
+
+    def test_etag_changed_with_vector_barcodes(self):
+        etag = self.report._get_aeroo_etag([self.partner.id], "odt")
+        self.report.aeroo_vector_barcodes = True
+        assert self.report._get_aeroo_etag([self.partner.id], "odt") != etag
+
+    def test_cached_document_not_returned_after_changing_vector_barcodes(self):
+        self._render()
+        self.report.aeroo_vector_barcodes = True
+        with mock.patch.object(
+            type(self.report), "_render_aeroo_document", return_value=b"new"
+        ):
+            assert self._render() == b"new"
+
+    def test_no_etag_for_record_modified_in_transaction(self):
+        self.partner.name = "New Name"
+        assert self.report._get_aeroo_etag([self.partner.id], "odt") is None
+
+    def test_etag_without_output_cache(self):
+        self.report.aeroo_output_cache = False
+        assert self.report._get_aeroo_etag([self.partner.id], "odt")
+
+    def test_no_etag_for_multiple_records(self):
+        partner_2 = self.partner.copy()
+        etag = self.report._get_aeroo_etag([self.partner.id, partner_2.id], "odt")
+        assert etag is None
+
+    def test_no_etag_for_report_from_list_of_records(self):
+        self.report.multi = True
+        assert self.report._get_aeroo_etag([self.partner.id], "odt") is None
+
+    def test_etag_changed_with_user(self):
+        etag = self.report._get_aeroo_etag([self.partner.id], "odt")
+        user = self.env.ref("base.user_demo")
+        report = self.report.with_user(user).sudo()
+        assert report._get_aeroo_etag([self.partner.id], "odt") != etag
+
+    def test_etag_changed_with_company(self):
+        etag = self.report._get_aeroo_etag([self.partner.id], "odt")
+        company = self.env["res.company"].create({"name": "Other Company"})
+        self.env.user.company_ids |= company
+        report = self.report.with_company(company)
+        assert report._get_aeroo_etag([self.partner.id], "odt") != etag
+
+    def test_no_etag_for_data_not_serializable(self):
+        etag = self.report._get_aeroo_etag(
+            [self.partner.id], "odt", data={"value": object()}
+        )
+        assert etag is None
@@ -0,0 +1,56 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import pytest
+from io import BytesIO
+from PyPDF2 import PdfFileReader
+from reportlab.pdfgen import canvas
+from unittest import mock
+from .. import pdf as pdf_module
+from ..pdf import PdfMergeError, merge_pdf
+
+
+def _make_pdf(text):
+    output = BytesIO()
+    pdf = canvas.Canvas(output)
+    pdf.drawString(100, 100, text)
+    pdf.showPage()
+    pdf.save()
+    return output.getvalue()
+
+
+def _read_pages(pdf):
+    reader = PdfFileReader(BytesIO(pdf))
+    return [
+        reader.getPage(i).extractText().strip() for i in range(reader.getNumPages())
+    ]
+
+
+@pytest.mark.parametrize("number_of_documents", [1, 3, 4, 7, 10, 17])
+def test_merged_pages_follow_the_order_of_documents(number_of_documents):
+    texts = ["Page {}".format(i) for i in range(number_of_documents)]
+    output = BytesIO()
+    merge_pdf((_make_pdf(t) for t in texts), output, chunk_size=3)
+    pages = _read_pages(output.getvalue())
+    assert len(pages) == number_of_documents
+    assert pages == texts
+
+
+def test_documents_merged_over_multiple_levels():
+    texts = ["Page {}".format(i) for i in range(2 * 3 + 1)]
+    output = BytesIO()
+    with mock.patch.object(pdf_module, "merge_pdf", wraps=merge_pdf) as merge:
+        merge_pdf((_make_pdf(t) for t in texts), output, chunk_size=3)
+    assert merge.call_count == 2
+    assert _read_pages(output.getvalue()) == texts
+
+
+def test_merge_file_objects():
+    output = BytesIO()
+    merge_pdf([BytesIO(_make_pdf("Page 1")), _make_pdf("Page 2")], output)
+    assert _read_pages(output.getvalue()) == ["Page 1", "Page 2"]
+
+
+def test_merge_invalid_pdf():
+    with pytest.raises(PdfMergeError):
+        merge_pdf([b"not a pdf"], BytesIO())
@@ -0,0 +1,116 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from PyPDF2 import PdfFileReader
+from io import BytesIO
+from unittest import mock
+
+from odoo.tests import common
+from odoo.tools import config
+
+
+class TestAerooRenderJob(common.SavepointCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partners = cls.env["res.partner"].create(
+            [{"name": "Partner {}".format(i), "lang": "en_US"} for i in range(3)]
+        )
+        cls.report = cls.env.ref("report_aeroo.aeroo_sample_report")
+        cls.report.write(
+            {
+                "attachment": None,
+                "attachment_use": False,
+                "aeroo_out_format_id": cls.env.ref(
+                    "report_aeroo.aeroo_mimetype_pdf_odt"
+                ).id,
+            }
+        )
+        cls.job = cls.env["aeroo.render.job"].create_job(cls.report, cls.partners.ids)
+
+    def _process_job(self):
+        with mock.patch.dict(config.options, {"aeroo_render_job_chunk_size": 2}):
+            while self.job.state in ("pending", "running"):
+                self.job._process_next_chunk()
+
+    def test_background_rendering_disabled_by_default(self):
+        assert not self.report._should_render_aeroo_in_background(self.partners.ids)
+
+    def test_background_threshold_defined_in_server_config(self):
+        with mock.patch.dict(config.options, {"aeroo_background_threshold": 2}):
+            assert self.report._should_render_aeroo_in_background(self.partners.ids)
+
+    def test_background_threshold_not_exceeded(self):
+        self.report.aeroo_background_threshold = 3
+        assert not self.report._should_render_aeroo_in_background(self.partners.ids)
+
+    def test_non_pdf_report_not_rendered_in_background(self):
+        self.report.aeroo_background_threshold = 2
+        assert not self.report._should_render_aeroo_in_background(
+            self.partners.ids, "odt"
+        )
+
+    def test_job_rendered_by_chunks(self):
+        self.job._process_next_chunk()
+        assert self.job.state == "running"
+        assert self.job.processed_count == 2
+        assert self.job.progress == 200 / 3
+
+    def test_job_done(self):
+        self._process_job()
+        assert self.job.state == "done"
+        assert self.job.progress == 100
+        pdf = PdfFileReader(BytesIO(self.job.attachment_id.raw))
+        assert pdf.getNumPages() == 3
+
+    def test_chunks_removed_when_job_done(self):
+        self._process_job()
+        assert self.job._get_chunk_attachments() == self.env["ir.attachment"]
+
+    def test_job_failed(self):
+        with mock.patch.object(
+            type(self.report),
+            "_render_aeroo_records",
+            side_effect=Exception("Rendering error"),
+        ):
+            self._process_job()
+        assert self.job.state == "failed"
+        assert "Rendering error" in self.job.error
+
+    def _run_cron(self):
+        with mock.patch.object(self.env.cr, "commit"):
+            self.env["aeroo.render.job"]._cron_process_jobs()
+
+    def test_attempt_counted_before_rendering_chunk(self):
+        with mock.patch.object(
+            type(self.job),
+            "_process_next_chunk",
+            autospec=True,
+            side_effect=lambda job: job.write({"state": "done"}),
+        ):
+            self._run_cron()
+        assert self.job.attempt_count == 1
+
+    def test_attempts_reset_when_chunk_committed(self):
+        self.job.attempt_count = 2
+        self.job._process_next_chunk()
+        assert self.job.attempt_count == 0
+
+    def test_job_failed_after_max_attempts(self):
+        self.job.attempt_count = 3
+        other_job = self.env["aeroo.render.job"].create_job(
+            self.report, self.partners.ids
+        )
+        with mock.patch.dict(config.options, {"aeroo_render_job_chunk_size": 2}):
+            self._run_cron()
+        assert self.job.state == "failed"
+        assert other_job.state == "done"
+
+    def test_time_budget_below_cron_time_limit(self):
+        options = {"limit_time_real": 120, "limit_time_real_cron": -1}
+        with mock.patch.dict(config.options, options):
+            assert self.job._get_time_budget() == 60
+
+        options = {"limit_time_real": 120, "limit_time_real_cron": 60}
+        with mock.patch.dict(config.options, options):
+            assert self.job._get_time_budget() == 30
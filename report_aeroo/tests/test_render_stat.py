@@ -0,0 +1,168 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import pytest
+from datetime import timedelta
+from unittest import mock
+from odoo import fields
+from odoo.tests import common
+from odoo.tools import config
+from ..render_stat import RenderStatBuffer, render_stat_buffer
+
+
+def test_rows_returned_when_batch_is_full():
+    buffer = RenderStatBuffer()
+    assert buffer.add("db", {"duration": 1}, batch_size=2, interval=60) == []
+    rows = buffer.add("db", {"duration": 2}, batch_size=2, interval=60)
+    assert rows == [{"duration": 1}, {"duration": 2}]
+    assert buffer.add("db", {"duration": 3}, batch_size=2, interval=60) == []
+
+
+def test_rows_returned_when_interval_is_elapsed():
+    buffer = RenderStatBuffer()
+    assert buffer.add("db", {"duration": 1}, batch_size=10, interval=0) == [
+        {"duration": 1}
+    ]
+
+
+def test_rows_buffered_per_database():
+    buffer = RenderStatBuffer()
+    buffer.add("db1", {"duration": 1}, batch_size=2, interval=60)
+    assert buffer.add("db2", {"duration": 2}, batch_size=2, interval=60) == []
+
+
+class TestAerooRenderStat(common.SavepointCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env["res.partner"].create({"name": "My Partner"})
+        cls.report = cls.env.ref("report_aeroo.aeroo_sample_report")
+        cls.report.write(
+            {
+                "attachment": None,
+                "attachment_use": False,
+                "aeroo_out_format_id": cls.env.ref(
+                    "report_aeroo.aeroo_mimetype_odt_odt"
+                ).id,
+            }
+        )
+
+    def setUp(self):
+        super().setUp()
+        # The buffer is shared by the process, across the transactions of the tests.
+        self._clear_buffer()
+        self.addCleanup(self._clear_buffer)
+
+    def _clear_buffer(self):
+        with render_stat_buffer._lock:
+            render_stat_buffer._rows.clear()
+
+    def _render(self, **kwargs):
+        with mock.patch.object(
+            type(self.env["aeroo.render.stat"]), "_add_stat"
+        ) as add_stat, mock.patch.object(
+            type(self.report), "_render_aeroo_document", **kwargs
+        ):
+            self.report._render_aeroo([self.partner.id])
+        add_stat.assert_called_once()
+        return add_stat.call_args[0][0]
+
+    def _create_stat(self, duration, **kwargs):
+        return self.env["aeroo.render.stat"].create(
+            dict(
+                {
+                    "date": fields.Datetime.now(),
+                    "report_id": self.report.id,
+                    "duration": duration,
+                    "success": True,
+                },
+                **kwargs
+            )
+        )
+
+    def test_rendering_recorded(self):
+        stat = self._render(return_value=b"document")
+        assert stat["report_id"] == self.report.id
+        assert stat["model"] == "res.partner"
+        assert stat["record_count"] == 1
+        assert stat["output_format"] == "odt"
+        assert stat["output_size"] == 8
+        assert stat["success"]
+        assert not stat["cache_hit"]
+        assert stat["duration"] >= stat["context_duration"]
+
+    def test_failed_rendering_not_successful(self):
+        with mock.patch.object(
+            type(self.env["aeroo.render.stat"]), "_add_stat"
+        ) as add_stat, mock.patch.object(
+            type(self.report), "_render_aeroo_document", side_effect=ValueError
+        ):
+            with pytest.raises(ValueError):
+                self.report._render_aeroo([self.partner.id])
+        assert not add_stat.call_args[0][0]["success"]
+
+    def test_stats_written_with_separate_cursor(self):
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value = self.env.cr
+        cursor.__exit__.return_value = False
+        with mock.patch.object(type(self.env.registry), "cursor", return_value=cursor):
+            self.env["aeroo.render.stat"]._write_stats(
+                [{"date": fields.Datetime.now(), "report_id": self.report.id}]
+            )
+        cursor.__exit__.assert_called_once()
+        stats = self.env["aeroo.render.stat"].search(
+            [("report_id", "=", self.report.id)]
+        )
+        assert len(stats) == 1
+
+    def test_write_error_not_raised(self):
+        with mock.patch.object(
+            type(self.env.registry), "cursor", side_effect=Exception("Deadlock")
+        ):
+            self.env["aeroo.render.stat"]._write_stats([{}])
+
+    def test_stats_written_when_batch_is_full(self):
+        with mock.patch.object(
+            type(self.env["aeroo.render.stat"]), "_write_stats"
+        ) as write_stats, mock.patch.dict(
+            config.options, {"aeroo_render_stat_batch_size": 2}
+        ):
+            self.env["aeroo.render.stat"]._add_stat({"duration": 1})
+            write_stats.assert_not_called()
+            self.env["aeroo.render.stat"]._add_stat({"duration": 2})
+        write_stats.assert_called_once_with([{"duration": 1}, {"duration": 2}])
+
+    def test_stat_error_does_not_fail_rendering(self):
+        with mock.patch.object(
+            type(self.env["aeroo.render.stat"]),
+            "_add_stat",
+            side_effect=Exception("Stat error"),
+        ), mock.patch.object(
+            type(self.report), "_render_aeroo_document", return_value=b"document"
+        ):
+            assert self.report._render_aeroo([self.partner.id])[0] == b"document"
+
+    def test_duration_percentiles(self):
+        for duration in range(1, 101):
+            self._create_stat(duration)
+        self.report.invalidate_cache()
+        assert self.report.aeroo_render_count == 100
+        assert self.report.aeroo_render_p50 == 50.5
+        assert self.report.aeroo_render_p95 == pytest.approx(95.05)
+        assert self.report.aeroo_render_p99 == pytest.approx(99.01)
+
+    def test_failed_renderings_excluded_from_percentiles(self):
+        self._create_stat(10)
+        self._create_stat(1000, success=False)
+        self.report.invalidate_cache()
+        assert self.report.aeroo_render_count == 1
+        assert self.report.aeroo_render_p99 == 10
+
+    def test_old_stats_removed(self):
+        old_stat = self._create_stat(
+            10, date=fields.Datetime.now() - timedelta(days=91)
+        )
+        new_stat = self._create_stat(10)
+        self.env["aeroo.render.stat"]._gc_render_stats()
+        assert not old_stat.exists()
+        assert new_stat.exists()
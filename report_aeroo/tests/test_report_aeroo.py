@@ -3,11 +3,18 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
 import base64
+import pytest
+import tempfile
 from freezegun import freeze_time
+from unittest import mock
 
 from odoo.exceptions import ValidationError
 from odoo.modules import module
 from odoo.tests import common
+from odoo.tools import config
+from odoo.addons.mail.models.mail_render_mixin import jinja_template_env
+from ..libreoffice import LibreofficeError
+from ..render_context import caching_render_contexts
 
 
 class TestAerooReport(common.SavepointCase):
@@ -241,3 +248,193 @@ class TestAerooReport(common.SavepointCase):
         self.report.aeroo_currency_eval = "o.company_id.currency_id"
         context = self.report._get_aeroo_context(self.partner)
         assert context["currency"] == currency
+
+    def test_render_context_evaluated_in_one_pass(self):
+        self.report.aeroo_tz_eval = "'America/Montreal'"
+        render_context = self.report._get_aeroo_render_context(self.partner)
+        assert render_context.lang == "en_US"
+        assert render_context.tz == "America/Montreal"
+        assert render_context.company == self.company
+
+    def test_render_context_is_immutable(self):
+        render_context = self.report._get_aeroo_render_context(self.partner)
+        with pytest.raises(AttributeError):
+            render_context.lang = "fr_FR"
+
+    def test_modified_expression_evaluated_in_same_transaction(self):
+        self.report._get_aeroo_render_context(self.partner)
+        self.report.aeroo_lang_eval = "'fr_FR'"
+        assert self.report._get_aeroo_lang(self.partner) == "fr_FR"
+
+    def test_unsafe_expression_not_evaluated(self):
+        self.report.aeroo_lang_eval = "open('/etc/passwd').read()"
+        with pytest.raises(ValueError):
+            self.report._get_aeroo_lang(self.partner)
+
+    def test_expression_errors_raised_like_safe_eval(self):
+        self.report.aeroo_lang_eval = "1 / 0"
+        with pytest.raises(ZeroDivisionError):
+            self.report._get_aeroo_lang(self.partner)
+
+    def test_render_context_evaluated_once_per_rendering(self):
+        with caching_render_contexts():
+            render_context = self.report._get_aeroo_render_context(self.partner)
+            self.report.aeroo_tz_eval = "'Europe/Paris'"
+            assert (
+                self.report._get_aeroo_render_context(self.partner) is render_context
+            )
+        assert self.report._get_aeroo_timezone(self.partner) == "Europe/Paris"
+
+    def test_single_getter_evaluates_only_its_expression(self):
+        self.report.aeroo_currency_eval = "1 / 0"
+        assert self.report._get_aeroo_lang(self.partner) == "en_US"
+
+    def test_render_contexts_of_recordset(self):
+        partners = self.partner | self.partner_2
+        render_contexts = self.report._get_aeroo_render_contexts(partners)
+        assert render_contexts[self.partner.id].company == self.company
+        assert not render_contexts[self.partner_2.id].company
+
+    def _count_render_context_queries(self, partners):
+        partners.invalidate_cache()
+        query_count = self.env.cr.sql_log_count
+        self.report._get_aeroo_render_contexts(partners)
+        return self.env.cr.sql_log_count - query_count
+
+    def test_render_contexts_use_prefetching(self):
+        self.report.aeroo_currency_eval = "o.company_id.currency_id"
+        partners = self.env["res.partner"].create(
+            [{"name": "Partner", "company_id": self.company.id} for i in range(10)]
+        )
+        assert self._count_render_context_queries(
+            partners[:2]
+        ) == self._count_render_context_queries(partners)
+
+    def test_base_context_built_once_per_environment(self):
+        report = self.report.with_context(lang="fr_FR")
+        assert report._get_aeroo_base_context() is report._get_aeroo_base_context()
+
+    def test_base_context_not_shared_between_contexts(self):
+        report_fr = self.report.with_context(lang="fr_FR")
+        report_en = self.report.with_context(lang="en_US")
+        format_date = report_fr._get_aeroo_base_context()["format_date"]
+        assert format_date is not report_en._get_aeroo_base_context()["format_date"]
+
+    def test_base_context_is_read_only(self):
+        with pytest.raises(TypeError):
+            self.report._get_aeroo_base_context()["format_date"] = None
+
+    def test_filenames_of_recordset(self):
+        self.report.attachment = "${o.name}"
+        filenames = self.report.get_aeroo_filenames(
+            self.partner | self.partner_2, "pdf"
+        )
+        assert filenames == {
+            self.partner.id: "My Partner.pdf",
+            self.partner_2.id: "My Partner 2.pdf",
+        }
+
+    def test_filename_template_compiled_once(self):
+        self.report.attachment = "${o.name}-compiled-once"
+        with mock.patch.object(
+            jinja_template_env, "from_string", wraps=jinja_template_env.from_string
+        ) as from_string:
+            self.report.get_aeroo_filenames(self.partner | self.partner_2, "pdf")
+        assert from_string.call_count == 1
+
+    def test_parallel_rendering_disabled_by_default(self):
+        assert self.report._get_aeroo_parallel_workers() == 1
+
+    def test_parallel_workers_defined_in_server_config(self):
+        with mock.patch.dict(config.options, {"aeroo_parallel_workers": "4"}):
+            assert self.report._get_aeroo_parallel_workers() == 4
+
+    def test_parallel_workers_defined_on_report(self):
+        self.report.aeroo_parallel_workers = 2
+        with mock.patch.dict(config.options, {"aeroo_parallel_workers": "4"}):
+            assert self.report._get_aeroo_parallel_workers() == 2
+
+    def test_batch_conversion_error_reported_against_record(self):
+        converter = mock.Mock()
+        converter.convert_many.side_effect = LibreofficeError("Error", index=1)
+        with mock.patch.object(
+            type(self.report), "_get_aeroo_converter", return_value=converter
+        ):
+            with self.assertRaises(ValidationError) as exc:
+                self.report._render_aeroo((self.partner | self.partner_2).ids)
+
+        assert "My Partner 2" in str(exc.exception)
+        assert converter.convert_many.call_count == 1
+
+    def test_find_attachments_of_multiple_records(self):
+        self.report.write({"attachment_use": True, "attachment": "${o.name}"})
+        partners = self.partner | self.partner_2
+        for partner in partners:
+            self.env["ir.attachment"].create(
+                {
+                    "name": "{}.pdf".format(partner.name),
+                    "datas": base64.b64encode(partner.name.encode()),
+                    "res_model": "res.partner",
+                    "res_id": partner.id,
+                }
+            )
+
+        result = self.report._find_aeroo_report_attachments(partners, "pdf")
+        assert result == {
+            self.partner.id: b"My Partner",
+            self.partner_2.id: b"My Partner 2",
+        }
+
+    def test_attachment_with_other_filename_not_found(self):
+        self.report.write({"attachment_use": True, "attachment": "${o.name}"})
+        self.env["ir.attachment"].create(
+            {
+                "name": "My Partner 2.pdf",
+                "datas": base64.b64encode(b"My Partner 2"),
+                "res_model": "res.partner",
+                "res_id": self.partner.id,
+            }
+        )
+        result = self.report._find_aeroo_report_attachments(self.partner, "pdf")
+        assert result == {}
+
+    def test_render_file_reads_attachment_from_filestore(self):
+        self.report.write({"attachment_use": True, "attachment": "${o.name}"})
+        self.env["ir.attachment"].create(
+            {
+                "name": "My Partner.pdf",
+                "datas": base64.b64encode(b"My Partner"),
+                "res_model": "res.partner",
+                "res_id": self.partner.id,
+            }
+        )
+        output, output_format = self.report._render_aeroo_file([self.partner.id])
+        with output:
+            assert output.read() == b"My Partner"
+        assert output_format == "pdf"
+
+    def test_render_file_of_single_record_uses_render_aeroo(self):
+        with mock.patch.object(
+            type(self.report), "_render_aeroo", return_value=(b"document", "odt")
+        ) as render_aeroo:
+            output, output_format = self.report._render_aeroo_file([self.partner.id])
+
+        with output:
+            assert output.read() == b"document"
+        assert output_format == "odt"
+        render_aeroo.assert_called_once_with([self.partner.id], None, None)
+
+    def test_render_file_of_multiple_records_spooled(self):
+        partners = self.partner | self.partner_2
+        with mock.patch.object(
+            type(self.report), "_render_aeroo_records", return_value=iter([])
+        ), mock.patch(
+            "odoo.addons.report_aeroo.models.ir_actions_report.merge_pdf",
+            side_effect=lambda pdfs, output: output.write(b"%PDF merged"),
+        ):
+            output, output_format = self.report._render_aeroo_file(partners.ids)
+
+        with output:
+            assert isinstance(output, tempfile.SpooledTemporaryFile)
+            assert output.read() == b"%PDF merged"
+        assert output_format == "pdf"
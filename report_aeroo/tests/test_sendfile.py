@@ -0,0 +1,55 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import os
+import pytest
+from io import BytesIO
+from unittest import mock
+from odoo.tools import config
+from ..controllers.main import _get_sendfile_headers
+
+
+@pytest.fixture
+def stored_file(tmpdir):
+    directory = tmpdir.mkdir("filestore").mkdir("mydb").mkdir("ab")
+    path = directory.join("abcdef")
+    path.write_binary(b"%PDF")
+    with open(str(path), "rb") as output:
+        yield output
+
+
+def _options(tmpdir, **options):
+    return mock.patch.dict(config.options, dict(options, data_dir=str(tmpdir)))
+
+
+def test_sendfile_disabled_by_default(tmpdir, stored_file):
+    with _options(tmpdir, aeroo_sendfile=""):
+        assert _get_sendfile_headers(stored_file, "mydb") == []
+
+
+def test_x_sendfile(tmpdir, stored_file):
+    with _options(tmpdir, aeroo_sendfile="X-Sendfile"):
+        headers = _get_sendfile_headers(stored_file, "mydb")
+    assert headers == [("X-Sendfile", os.path.realpath(stored_file.name))]
+
+
+def test_x_accel_redirect(tmpdir, stored_file):
+    with _options(
+        tmpdir,
+        aeroo_sendfile="x-accel-redirect",
+        aeroo_sendfile_location="/internal/",
+    ):
+        headers = _get_sendfile_headers(stored_file, "mydb")
+    assert headers == [("X-Accel-Redirect", "/internal/mydb/ab/abcdef")]
+
+
+def test_file_in_memory_sent_by_odoo(tmpdir):
+    with _options(tmpdir, aeroo_sendfile="x-sendfile"):
+        assert _get_sendfile_headers(BytesIO(b"%PDF"), "mydb") == []
+
+
+def test_file_outside_filestore_sent_by_odoo(tmpdir):
+    path = tmpdir.join("other.pdf")
+    path.write_binary(b"%PDF")
+    with _options(tmpdir, aeroo_sendfile="x-sendfile"), open(str(path), "rb") as f:
+        assert _get_sendfile_headers(f, "mydb") == []
@@ -0,0 +1,43 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import time
+from ..timing import RenderTimings, collect_render_timings, render_stage
+
+
+@render_stage("convert")
+def _convert():
+    time.sleep(0.02)
+
+
+def test_stages_not_measured_outside_collect_block():
+    with render_stage("generate"):
+        pass
+    _convert()
+
+
+def test_stage_durations_collected():
+    with collect_render_timings() as timings:
+        _convert()
+        _convert()
+    assert list(timings.durations) == ["convert"]
+    assert timings.durations["convert"] >= 0.04
+    assert timings.total >= timings.durations["convert"]
+
+
+def test_nested_stage_excluded_from_outer_stage():
+    with collect_render_timings() as timings:
+        with render_stage("merge"):
+            _convert()
+    assert timings.durations["merge"] < 0.02
+    assert timings.durations["convert"] >= 0.02
+
+
+def test_server_timing_header():
+    timings = RenderTimings()
+    timings.durations["context"] = 0.0012
+    timings.total = 0.5
+    timings.query_count = 42
+    assert timings.get_server_timing() == (
+        'context;dur=1.2, total;dur=500.0, sql;desc="42 queries"'
+    )
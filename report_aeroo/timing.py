@@ -0,0 +1,131 @@
+# Copyright 2018 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License GPL-3.0 or later (http://www.gnu.org/licenses/gpl).
+
+"""Measure the duration of the stages of a report rendering.
+
+The durations are only collected inside a collect_render_timings block,
+so that the instrumentation of the rendering does nothing otherwise.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class RenderTimings(object):
+    """The durations of the stages of a report rendering.
+
+    A stage measured inside another stage is excluded from the duration
+    of the outer stage, so that the durations of the stages add up.
+    """
+
+    def __init__(self):
+        self.durations = OrderedDict()
+        self.total = None
+        self.query_count = None
+        self.cache_hits = 0
+        self._stack = []
+
+    def start(self, stage):
+        self._stack.append([stage, time.perf_counter(), 0.0])
+
+    def stop(self):
+        stage, start, nested_duration = self._stack.pop()
+        duration = time.perf_counter() - start
+
+        if self._stack:
+            self._stack[-1][2] += duration
+
+        self.durations[stage] = (
+            self.durations.get(stage, 0.0) + duration - nested_duration
+        )
+
+    def merge(self, timings):
+        """Add the durations collected in a nested block to these timings.
+
+        :param RenderTimings timings: the timings of the nested block
+        """
+        for stage, duration in timings.durations.items():
+            self.durations[stage] = self.durations.get(stage, 0.0) + duration
+
+        if self._stack:
+            self._stack[-1][2] += timings.total
+
+        self.cache_hits += timings.cache_hits
+
+    def get_server_timing(self):
+        """Format the durations as the value of a Server-Timing header.
+
+        :rtype: str
+        """
+        metrics = [
+            "{};dur={:.1f}".format(stage, duration * 1000)
+            for stage, duration in self.durations.items()
+        ]
+        if self.total is not None:
+            metrics.append("total;dur={:.1f}".format(self.total * 1000))
+        if self.query_count is not None:
+            metrics.append('sql;desc="{} queries"'.format(self.query_count))
+        return ", ".join(metrics)
+
+    def __str__(self):
+        values = [
+            "{}={:.1f}ms".format(stage, duration * 1000)
+            for stage, duration in self.durations.items()
+        ]
+        if self.total is not None:
+            values.append("total={:.1f}ms".format(self.total * 1000))
+        if self.query_count is not None:
+            values.append("queries={}".format(self.query_count))
+        return " ".join(values)
+
+
+@contextmanager
+def collect_render_timings():
+    """Collect the durations of the stages rendered inside the block.
+
+    When nested inside another block, the durations are also added
+    to the timings of the outer block.
+
+    :return: the RenderTimings filled when the block exits
+    """
+    previous = getattr(_local, "timings", None)
+    timings = _local.timings = RenderTimings()
+    start = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        timings.total = time.perf_counter() - start
+        _local.timings = previous
+        if previous is not None:
+            previous.merge(timings)
+
+
+@contextmanager
+def render_stage(stage):
+    """Measure the duration of a stage of the rendering.
+
+    This can be used as a context manager or as a decorator.
+
+    :param str stage: the name of the stage (a token of the Server-Timing header)
+    """
+    timings = getattr(_local, "timings", None)
+    if timings is None:
+        yield
+        return
+
+    timings.start(stage)
+    try:
+        yield
+    finally:
+        timings.stop()
+
+
+def record_cache_hit():
+    """Count a document read from a cache or an attachment instead of being rendered."""
+    timings = getattr(_local, "timings", None)
+    if timings is not None:
+        timings.cache_hits += 1